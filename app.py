@@ -1,17 +1,552 @@
 import streamlit as st
-import traceback
-from math_solver import MathSolver
-from nlp_processor import NLPProcessor
-from solution_formatter import SolutionFormatter
+import html
+import random
+import re
+import textwrap
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-# Initialize components
+# Longest problem text accepted for solving
+MAX_INPUT_LENGTH = 2000
+
+# Control characters (other than tab and line breaks), which no problem needs
+CONTROL_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]')
+
+# Two adjacent letters; input without any cannot contain a word
+LETTER_PAIR = re.compile(r'[^\W\d_]{2}')
+
+# Static page content, built once at import instead of on every rerun.
+# It is still emitted on each run, because Streamlit drops elements a run does not write.
+APP_CSS = """
+<style>
+/* Dark theme overrides */
+.stApp {
+    background-color: #1a1a1a !important;
+    color: #ffffff !important;
+}
+.main {
+    background-color: #1a1a1a !important;
+}
+.main-header {
+    text-align: center;
+    padding: 2rem 0;
+    background: linear-gradient(135deg, #4a5bc7 0%, #5a67d8 100%);
+    margin: -1rem -1rem 2rem -1rem;
+    border-radius: 0 0 20px 20px;
+    color: white;
+}
+.main-header h1 {
+    color: white !important;
+    font-size: 3rem !important;
+    margin-bottom: 0.5rem !important;
+    text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
+}
+.main-header p {
+    color: #f0f0f0 !important;
+    font-size: 1.2rem !important;
+    margin: 0 !important;
+}
+.stTextArea > div > div > textarea {
+    background-color: #2d2d2d !important;
+    color: #ffffff !important;
+    border-radius: 15px;
+    border: 2px solid #444444;
+    padding: 1rem;
+    font-size: 1.1rem;
+    transition: all 0.3s ease;
+}
+.stTextArea > div > div > textarea:focus {
+    border-color: #4a5bc7;
+    box-shadow: 0 0 15px rgba(74, 91, 199, 0.3);
+    background-color: #333333 !important;
+}
+.stButton > button {
+    border-radius: 25px;
+    padding: 0.75rem 2rem;
+    font-weight: 600;
+    transition: all 0.3s ease;
+    text-transform: uppercase;
+    letter-spacing: 1px;
+}
+.stButton > button:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 5px 15px rgba(0,0,0,0.2);
+}
+.solution-container {
+    background: linear-gradient(135deg, #2d2d2d 0%, #3a3a3a 100%);
+    padding: 2rem;
+    border-radius: 20px;
+    margin: 1rem 0;
+    border: 1px solid #444444;
+    color: #ffffff !important;
+}
+.step-card {
+    background: #2d2d2d;
+    color: #ffffff !important;
+    padding: 1rem;
+    margin: 0.5rem 0;
+    border-radius: 10px;
+    border-left: 4px solid #4a5bc7;
+    box-shadow: 0 2px 10px rgba(0,0,0,0.3);
+}
+.answer-highlight {
+    background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
+    color: white;
+    padding: 1rem;
+    border-radius: 15px;
+    text-align: center;
+    font-size: 1.2rem;
+    font-weight: 600;
+    margin: 1rem 0;
+}
+.sidebar-content {
+    background: #2d2d2d;
+    color: #ffffff !important;
+    padding: 1rem;
+    border-radius: 10px;
+    margin: 0.5rem 0;
+    border: 1px solid #444444;
+}
+.feature-card {
+    background: #2d2d2d;
+    color: #ffffff !important;
+    padding: 1rem;
+    border-radius: 10px;
+    margin: 0.5rem 0;
+    border: 1px solid #444444;
+    transition: all 0.3s ease;
+}
+.feature-card:hover {
+    box-shadow: 0 5px 15px rgba(0,0,0,0.1);
+    transform: translateY(-2px);
+}
+.feature-card h3, .feature-card h4 {
+    color: #6c7ce7 !important;
+}
+.feature-card p, .feature-card div, .feature-card li {
+    color: #ffffff !important;
+}
+.math-symbol {
+    color: #6c7ce7 !important;
+    font-weight: bold;
+}
+.white-bg-text {
+    color: #ffffff !important;
+}
+.dark-text {
+    color: #ffffff !important;
+}
+/* Dark theme for Streamlit elements */
+.stMarkdown, .stText, .stDataFrame {
+    color: #ffffff !important;
+    background-color: transparent !important;
+}
+.stSelectbox label, .stTextArea label, .stButton label {
+    color: #ffffff !important;
+}
+.stSelectbox > div > div {
+    background-color: #2d2d2d !important;
+    color: #ffffff !important;
+    border: 1px solid #444444 !important;
+}
+/* Dark theme for markdown containers */
+div[data-testid="stMarkdownContainer"] p, 
+div[data-testid="stMarkdownContainer"] li,
+div[data-testid="stMarkdownContainer"] span {
+    color: #ffffff !important;
+}
+/* Dark theme for sidebar */
+.css-1d391kg, .css-1lcbmhc {
+    background-color: #1a1a1a !important;
+    color: #ffffff !important;
+}
+section[data-testid="stSidebar"] {
+    background-color: #1a1a1a !important;
+}
+section[data-testid="stSidebar"] > div {
+    background-color: #1a1a1a !important;
+}
+</style>
+"""
+
+HEADER_HTML = """
+<div class="main-header">
+    <h1>🧮 AI Math Problem Solver</h1>
+    <p>✨ Enter your mathematical problem and get step-by-step solutions with beautiful formatting!</p>
+</div>
+"""
+
+TIPS_HTML = """
+<div class="sidebar-content">
+    <h3 style="color: #6c7ce7 !important;">💡 Tips:</h3>
+    <ul style="color: #cccccc !important; font-size: 0.9rem;">
+        <li style="color: #cccccc !important;">Use <span class="math-symbol">√</span> for square roots</li>
+        <li style="color: #cccccc !important;">Use <span class="math-symbol">^</span> for exponents</li>
+        <li style="color: #cccccc !important;">Use <span class="math-symbol">π</span> for pi</li>
+        <li style="color: #cccccc !important;">Natural language is supported!</li>
+    </ul>
+</div>
+"""
+
+FOOTER_HTML = """
+<div style="background: linear-gradient(135deg, #4a5bc7 0%, #5a67d8 100%); 
+            color: white; padding: 2rem; border-radius: 20px; margin: 2rem 0; text-align: center;">
+    <h2 style="color: white; margin-bottom: 1.5rem;">📚 How to Use AI Math Solver</h2>
+    <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 1rem; text-align: left;">
+        <div style="background: rgba(255,255,255,0.1); padding: 1rem; border-radius: 10px;">
+            <h4 style="color: #fff; margin-bottom: 0.5rem;">1️⃣ Enter Problem</h4>
+            <p style="color: #f0f0f0; margin: 0; font-size: 0.9rem;">Type your mathematical problem using natural language or mathematical notation</p>
+        </div>
+        <div style="background: rgba(255,255,255,0.1); padding: 1rem; border-radius: 10px;">
+            <h4 style="color: #fff; margin-bottom: 0.5rem;">2️⃣ Select Type</h4>
+            <p style="color: #f0f0f0; margin: 0; font-size: 0.9rem;">Choose problem type or let AI auto-detect it for you</p>
+        </div>
+        <div style="background: rgba(255,255,255,0.1); padding: 1rem; border-radius: 10px;">
+            <h4 style="color: #fff; margin-bottom: 0.5rem;">3️⃣ Solve</h4>
+            <p style="color: #f0f0f0; margin: 0; font-size: 0.9rem;">Click 'Solve Problem' to get detailed step-by-step solutions</p>
+        </div>
+        <div style="background: rgba(255,255,255,0.1); padding: 1rem; border-radius: 10px;">
+            <h4 style="color: #fff; margin-bottom: 0.5rem;">4️⃣ Understand</h4>
+            <p style="color: #f0f0f0; margin: 0; font-size: 0.9rem;">Review the solution with explanations and beautiful mathematical formatting</p>
+        </div>
+    </div>
+    <div style="margin-top: 1.5rem; padding-top: 1rem; border-top: 1px solid rgba(255,255,255,0.2);">
+        <p style="color: #f0f0f0; margin: 0; font-size: 0.9rem;">
+            ✨ Powered by AI • 🧮 Advanced Mathematics • 📊 Beautiful Visualizations
+        </p>
+    </div>
+</div>
+"""
+
+# Template for the original-problem panel at the top of a solution
+ORIGINAL_PROBLEM_HTML = """
+<div style="background: #3a3a3a; padding: 1rem; border-radius: 10px; border-left: 4px solid #6c7ce7; margin-bottom: 1.5rem;">
+    <h4 style="color: #6c7ce7 !important; margin-bottom: 0.5rem;">📝 Original Problem:</h4>
+    <div style="background: #2d2d2d; padding: 1rem; border-radius: 8px; font-family: monospace; font-size: 1.1rem; color: #ffffff !important;">
+{problem}
+    </div>
+</div>
+"""
+
+# Template for one numbered card in the step-by-step solution
+STEP_CARD_HTML = """
+<div class="step-card">
+    <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
+        <div style="background: #6c7ce7; color: white; border-radius: 50%; 
+                    width: 30px; height: 30px; display: flex; align-items: center; 
+                    justify-content: center; margin-right: 1rem; font-weight: bold;">
+            {i}
+        </div>
+        <div style="font-size: 1.1rem; line-height: 1.4; color: #ffffff !important;">
+            {step}
+        </div>
+    </div>
+</div>
+"""
+
+# Template for one card in the additional-information list
+INFO_CARD_HTML = """
+<div style="background: #3a3a3a; padding: 1rem; border-radius: 10px; 
+            border-left: 4px solid #6c7ce7; margin: 0.5rem 0; color: #ffffff;">
+    <strong style="color: #ffffff;">💡</strong> <span style="color: #ffffff;">{info}</span>
+</div>
+"""
+
+# Problem types offered in the sidebar, mapped to the names the solver expects
+PROBLEM_TYPES = {
+    "🤖 Auto-detect": "Auto-detect",
+    "🔢 Algebra": "Algebra",
+    "📈 Calculus": "Calculus",
+    "📐 Geometry": "Geometry",
+    "📝 Word Problem": "Word Problem",
+    "⚖️ Direct Equation": "Direct Equation"
+}
+
+# Example cards shown in the sidebar: (icon, example, description)
+SIDEBAR_EXAMPLES = (
+    ("🔢", "Solve x² + 5x + 6 = 0", "Quadratic equation"),
+    ("📊", "Find derivative of x³ + 2x²", "Calculus differentiation"),
+    ("∫", "Integrate sin(x) dx", "Calculus integration"),
+    ("🚗", "Car travels 60 miles in 2 hours. Speed?", "Word problem")
+)
+
+# All sidebar example cards as one HTML block, emitted with a single st.markdown
+SIDEBAR_EXAMPLES_HTML = "".join(f"""
+<div class="feature-card">
+    <strong style="color: #ffffff !important;">{icon} {example}</strong><br>
+    <small style="color: #cccccc !important;">{description}</small>
+</div>
+""" for icon, example, description in SIDEBAR_EXAMPLES)
+
+# Problems picked from by the Random button
+RANDOM_EXAMPLES = (
+    # Algebraic equations
+    "solve x² + 4x - 5 = 0",
+    "solve 2x + 10 = 0",
+    "factor x² - 9",
+    "solve √(x + 1) = 3",
+    "simplify (x + 2)(x - 3)",
+
+    # Calculus problems
+    "find derivative of x³ + 2x²",
+    "integrate x² dx",
+    "find derivative of sin(x)",
+    "integrate cos(x) dx",
+
+    # Word problems - Speed/Distance/Time
+    "A car travels 120 miles in 3 hours. What is its speed?",
+    "If a train travels at 60 mph for 2.5 hours, how far does it go?",
+
+    # Word problems - Money
+    "Sarah buys 3 books for $15 each and 2 pens for $2 each. What is the total cost?",
+    "A shirt costs $25. If there's a 20% discount, what is the final price?",
+
+    # Word problems - Age
+    "John is 5 years older than Mary. If Mary is 20 years old, how old is John?",
+
+    # Word problems - Geometry
+    "What is the area of a rectangle with length 8 feet and width 5 feet?",
+    "Find the perimeter of a square with side length 7 meters",
+
+    # Word problems - Percentage
+    "What is 25% of 80?",
+    "A population of 1000 increases by 15%. What is the new population?",
+
+    # Word problems - General
+    "If 12 apples cost $6, how much do 8 apples cost?",
+
+    # Complex word problems - Systems of equations
+    "A boat travels 24 km downstream in 3 hours and the same distance upstream in 4 hours. Find the speed of the boat in still water and the speed of the current.",
+    "Two numbers sum to 50 and their difference is 10. Find the numbers."
+)
+
+# Initialize components once per process; the instances are shared across sessions
+@st.cache_resource(show_spinner=False)
 def init_components():
     """Initialize the math solver and NLP processor"""
+    # Imported here so SymPy and matplotlib load on the first solve, not on first paint
+    from math_solver import MathSolver
+    from nlp_processor import NLPProcessor
+    from solution_formatter import SolutionFormatter
+    
     solver = MathSolver()
     nlp = NLPProcessor()
     formatter = SolutionFormatter()
     return solver, nlp, formatter
 
+# Longest a single solve may run before the user gets an error instead of a spinner
+SOLVE_TIMEOUT = 30
+
+# Worker threads for SymPy solves, shared by all sessions in the process.
+# A timeout only stops the wait: a thread can't be interrupted, so a runaway
+# solve keeps its worker until SymPy returns. New solves are refused while
+# every worker is busy, rather than queued behind solves that may never end.
+SOLVE_WORKERS = 4
+
+@st.cache_resource(show_spinner=False)
+def get_solve_executor():
+    """Create the thread pool that runs solver calls, with a count of its free workers"""
+    executor = ThreadPoolExecutor(max_workers=SOLVE_WORKERS, thread_name_prefix="solver")
+    return executor, threading.BoundedSemaphore(SOLVE_WORKERS)
+
+# Version of the solver's output. The disk cache below never expires and is keyed
+# only on solve_cached's own source and arguments, so bump this whenever a change
+# to math_solver.py alters results; entries from older versions are then ignored.
+SOLVER_CACHE_VERSION = 2
+
+# Cached wrappers so repeated solves of the same problem skip SymPy entirely.
+# They pull the shared components from init_components, so only the problem
+# text and type (plus the solver version) make up the cache key.
+# Solve results are also persisted to disk so they survive app restarts
+@st.cache_data(persist="disk", max_entries=2048, show_spinner=False)
+def solve_cached(problem, problem_type, solver_version):
+    """Solve a problem, reusing the result for repeated (problem, type) pairs"""
+    solver, _, _ = init_components()
+    executor, free_workers = get_solve_executor()
+    if not free_workers.acquire(blocking=False):
+        raise RuntimeError("The solver is busy with other problems; please try again in a moment.")
+    future = executor.submit(solver.solve_problem, problem, problem_type)
+    # The worker is free again only once the solve itself ends, not when the wait times out
+    future.add_done_callback(lambda _: free_workers.release())
+    try:
+        return future.result(timeout=SOLVE_TIMEOUT)
+    except TimeoutError:
+        raise TimeoutError(f"Solving took longer than {SOLVE_TIMEOUT} seconds") from None
+
+# Problems from the sidebar examples, solved ahead of time so the demos render instantly
+WARM_PROBLEMS = (
+    "Solve x² + 5x + 6 = 0",
+    "Find derivative of x³ + 2x²",
+    "Integrate sin(x) dx",
+)
+
+def _solve_warm_problems():
+    """Solve each example problem once, so its result lands in the solve cache"""
+    for problem in WARM_PROBLEMS:
+        # Warming is best effort; a failed example is simply solved on demand later
+        try:
+            solve_cached(problem, "Auto-detect", SOLVER_CACHE_VERSION)
+        except Exception:
+            pass
+
+@st.cache_resource(show_spinner=False)
+def warm_solve_cache():
+    """Start filling the solve cache in the background, once per process"""
+    # A background thread keeps the warm-up off every user's request path
+    thread = threading.Thread(target=_solve_warm_problems, name="solve-cache-warmup", daemon=True)
+    thread.start()
+    return thread
+
+@st.cache_data(ttl="1h", max_entries=512, show_spinner=False)
+def is_word_problem_cached(text):
+    """Check whether the text is a word problem, reusing earlier answers"""
+    # Every narrative indicator has at least two letters in a row, so input
+    # without one is plain notation and needs no NLP pass
+    if not LETTER_PAIR.search(text):
+        return False
+    _, nlp, _ = init_components()
+    return nlp.is_word_problem(text)
+
+@st.cache_data(ttl="1h", max_entries=512, show_spinner=False)
+def extract_math_cached(text):
+    """Extract the math expression from a word problem, reusing earlier answers"""
+    _, nlp, _ = init_components()
+    return nlp.extract_math_from_text(text)
+
+# Solve and format under one key, so a repeated problem skips formatting and
+# plot rendering too. Only the PNG bytes of the plot are kept; the live
+# matplotlib figure is dropped so the cached value stays small to pickle.
+@st.cache_data(ttl="1h", max_entries=512, show_spinner=False)
+def solve_and_format_cached(problem, problem_type):
+    """Solve a problem and format the result; the formatted part is None on failure"""
+    solution = solve_cached(problem, problem_type, SOLVER_CACHE_VERSION)
+    if not solution or "error" in solution:
+        return solution, None
+    
+    _, _, formatter = init_components()
+    formatted_solution = formatter.format_solution(solution)
+    formatted_solution.pop("plot", None)
+    return solution, formatted_solution
+
+def check_input(text):
+    """Cheap syntax check run before solving; returns a message for bad input or None"""
+    if len(text) > MAX_INPUT_LENGTH:
+        return f"Input is too long (at most {MAX_INPUT_LENGTH} characters)."
+    if CONTROL_CHARS.search(text):
+        return "Input contains control characters."
+    if text.count('(') != text.count(')'):
+        return "Parentheses are not balanced."
+    return None
+
+def clear_input():
+    """Reset the problem input; runs before the next script pass, so no rerun is needed"""
+    st.session_state.problem_input = ""
+    st.session_state.pop('last_solution', None)
+
+def load_random_example():
+    """Put a random example into the problem input before the next script pass"""
+    st.session_state.problem_input = random.choice(RANDOM_EXAMPLES)
+
+def render_solution(problem_input, formatted_solution):
+    """Render a formatted solution"""
+    # Original problem, steps and final answer are sent as one HTML block
+    # inside the solution container; each part is dedented so it stays raw HTML
+    parts = ['<div class="solution-container">', """
+    <h2 style="color: #6c7ce7; text-align: center; margin-bottom: 2rem;">
+        📋 Complete Solution
+    </h2>
+    """]
+    
+    # Display original problem in enhanced format
+    parts.append(ORIGINAL_PROBLEM_HTML.format(problem=html.escape(problem_input)))
+    
+    # Enhanced step-by-step solution
+    if formatted_solution.get("steps"):
+        parts.append("""
+        <h3 style="color: #6c7ce7; margin: 1.5rem 0 1rem 0;">
+            🔢 Step-by-Step Solution:
+        </h3>
+        """)
+        
+        parts.extend(STEP_CARD_HTML.format(i=i, step=step)
+                     for i, step in enumerate(formatted_solution["steps"], 1))
+    
+    # Enhanced final answer display
+    if formatted_solution.get("answer"):
+        parts.append("""
+        <h3 style="color: #6c7ce7; margin: 1.5rem 0 1rem 0;">
+            🎯 Final Answer:
+        </h3>
+        """)
+        
+        parts.append(f"""
+        <div class="answer-highlight">
+            <div style="font-size: 1.5rem; margin-bottom: 0.5rem;">🏆</div>
+            <div style="font-size: 1.3rem;">{formatted_solution["answer"]}</div>
+        </div>
+        """)
+    
+    parts.append('</div>')
+    
+    # Enhanced additional info
+    info_parts = []
+    if formatted_solution.get("info"):
+        info_parts.append("""
+        <h3 style="color: #6c7ce7; margin: 1.5rem 0 1rem 0;">
+            💡 Additional Information:
+        </h3>
+        """)
+        info_parts.extend(INFO_CARD_HTML.format(info=info) for info in formatted_solution["info"])
+    
+    # Everything up to the plot goes out as one markdown element; only the image needs its own
+    if formatted_solution.get("plot_png"):
+        parts.append("""
+        <h3 style="color: #6c7ce7; margin: 1.5rem 0 1rem 0;">
+            📊 Visualization:
+        </h3>
+        """)
+    else:
+        parts.extend(info_parts)
+        info_parts = []
+    st.markdown("\n".join(textwrap.dedent(part).strip() for part in parts), unsafe_allow_html=True)
+    
+    # Enhanced plot display
+    if formatted_solution.get("plot_png"):
+        plot_col1, plot_col2, plot_col3 = st.columns([1, 3, 1])
+        with plot_col2:
+            st.image(formatted_solution["plot_png"])
+    
+    if info_parts:
+        st.markdown("\n".join(textwrap.dedent(part).strip() for part in info_parts), unsafe_allow_html=True)
+
+@st.fragment
+def render_sidebar():
+    """Render the sidebar; changing the problem type reruns only this fragment"""
+    st.markdown("""
+    <div class="sidebar-content">
+        <h2 style="color: #6c7ce7; text-align: center; margin-bottom: 1rem;">🎯 Problem Type</h2>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    st.selectbox(
+        "🔍 Select the type of problem:",
+        list(PROBLEM_TYPES),
+        format_func=lambda x: x,
+        key="problem_type"
+    )
+    
+    st.markdown("""
+    <div class="sidebar-content">
+        <h3 style="color: #6c7ce7;">💡 Examples:</h3>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Enhanced examples with better formatting
+    st.markdown(SIDEBAR_EXAMPLES_HTML, unsafe_allow_html=True)
+    
+    # Add helpful tips
+    st.markdown(TIPS_HTML, unsafe_allow_html=True)
+
 def main():
     st.set_page_config(
         page_title="AI Math Problem Solver",
@@ -21,221 +556,15 @@ def main():
     )
     
     # Custom CSS for dark theme styling
-    st.markdown("""
-    <style>
-    /* Dark theme overrides */
-    .stApp {
-        background-color: #1a1a1a !important;
-        color: #ffffff !important;
-    }
-    .main {
-        background-color: #1a1a1a !important;
-    }
-    .main-header {
-        text-align: center;
-        padding: 2rem 0;
-        background: linear-gradient(135deg, #4a5bc7 0%, #5a67d8 100%);
-        margin: -1rem -1rem 2rem -1rem;
-        border-radius: 0 0 20px 20px;
-        color: white;
-    }
-    .main-header h1 {
-        color: white !important;
-        font-size: 3rem !important;
-        margin-bottom: 0.5rem !important;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-    }
-    .main-header p {
-        color: #f0f0f0 !important;
-        font-size: 1.2rem !important;
-        margin: 0 !important;
-    }
-    .stTextArea > div > div > textarea {
-        background-color: #2d2d2d !important;
-        color: #ffffff !important;
-        border-radius: 15px;
-        border: 2px solid #444444;
-        padding: 1rem;
-        font-size: 1.1rem;
-        transition: all 0.3s ease;
-    }
-    .stTextArea > div > div > textarea:focus {
-        border-color: #4a5bc7;
-        box-shadow: 0 0 15px rgba(74, 91, 199, 0.3);
-        background-color: #333333 !important;
-    }
-    .stButton > button {
-        border-radius: 25px;
-        padding: 0.75rem 2rem;
-        font-weight: 600;
-        transition: all 0.3s ease;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-    }
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 5px 15px rgba(0,0,0,0.2);
-    }
-    .solution-container {
-        background: linear-gradient(135deg, #2d2d2d 0%, #3a3a3a 100%);
-        padding: 2rem;
-        border-radius: 20px;
-        margin: 1rem 0;
-        border: 1px solid #444444;
-        color: #ffffff !important;
-    }
-    .step-card {
-        background: #2d2d2d;
-        color: #ffffff !important;
-        padding: 1rem;
-        margin: 0.5rem 0;
-        border-radius: 10px;
-        border-left: 4px solid #4a5bc7;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.3);
-    }
-    .answer-highlight {
-        background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
-        color: white;
-        padding: 1rem;
-        border-radius: 15px;
-        text-align: center;
-        font-size: 1.2rem;
-        font-weight: 600;
-        margin: 1rem 0;
-    }
-    .sidebar-content {
-        background: #2d2d2d;
-        color: #ffffff !important;
-        padding: 1rem;
-        border-radius: 10px;
-        margin: 0.5rem 0;
-        border: 1px solid #444444;
-    }
-    .feature-card {
-        background: #2d2d2d;
-        color: #ffffff !important;
-        padding: 1rem;
-        border-radius: 10px;
-        margin: 0.5rem 0;
-        border: 1px solid #444444;
-        transition: all 0.3s ease;
-    }
-    .feature-card:hover {
-        box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-        transform: translateY(-2px);
-    }
-    .feature-card h3, .feature-card h4 {
-        color: #6c7ce7 !important;
-    }
-    .feature-card p, .feature-card div, .feature-card li {
-        color: #ffffff !important;
-    }
-    .math-symbol {
-        color: #6c7ce7 !important;
-        font-weight: bold;
-    }
-    .white-bg-text {
-        color: #ffffff !important;
-    }
-    .dark-text {
-        color: #ffffff !important;
-    }
-    /* Dark theme for Streamlit elements */
-    .stMarkdown, .stText, .stDataFrame {
-        color: #ffffff !important;
-        background-color: transparent !important;
-    }
-    .stSelectbox label, .stTextArea label, .stButton label {
-        color: #ffffff !important;
-    }
-    .stSelectbox > div > div {
-        background-color: #2d2d2d !important;
-        color: #ffffff !important;
-        border: 1px solid #444444 !important;
-    }
-    /* Dark theme for markdown containers */
-    div[data-testid="stMarkdownContainer"] p, 
-    div[data-testid="stMarkdownContainer"] li,
-    div[data-testid="stMarkdownContainer"] span {
-        color: #ffffff !important;
-    }
-    /* Dark theme for sidebar */
-    .css-1d391kg, .css-1lcbmhc {
-        background-color: #1a1a1a !important;
-        color: #ffffff !important;
-    }
-    section[data-testid="stSidebar"] {
-        background-color: #1a1a1a !important;
-    }
-    section[data-testid="stSidebar"] > div {
-        background-color: #1a1a1a !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(APP_CSS, unsafe_allow_html=True)
     
     # Enhanced header
-    st.markdown("""
-    <div class="main-header">
-        <h1>🧮 AI Math Problem Solver</h1>
-        <p>✨ Enter your mathematical problem and get step-by-step solutions with beautiful formatting!</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Initialize components
-    try:
-        solver, nlp, formatter = init_components()
-    except Exception as e:
-        st.error(f"Failed to initialize components: {str(e)}")
-        st.stop()
+    st.markdown(HEADER_HTML, unsafe_allow_html=True)
     
     # Enhanced sidebar for problem type selection
     with st.sidebar:
-        st.markdown("""
-        <div class="sidebar-content">
-            <h2 style="color: #6c7ce7; text-align: center; margin-bottom: 1rem;">🎯 Problem Type</h2>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        problem_type = st.selectbox(
-            "🔍 Select the type of problem:",
-            ["🤖 Auto-detect", "🔢 Algebra", "📈 Calculus", "📐 Geometry", "📝 Word Problem", "⚖️ Direct Equation"],
-            format_func=lambda x: x
-        )
-        
-        st.markdown("""
-        <div class="sidebar-content">
-            <h3 style="color: #6c7ce7;">💡 Examples:</h3>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Enhanced examples with better formatting
-        examples = [
-            ("🔢", "Solve x² + 5x + 6 = 0", "Quadratic equation"),
-            ("📊", "Find derivative of x³ + 2x²", "Calculus differentiation"),
-            ("∫", "Integrate sin(x) dx", "Calculus integration"),
-            ("🚗", "Car travels 60 miles in 2 hours. Speed?", "Word problem")
-        ]
-        
-        for icon, example, description in examples:
-            st.markdown(f"""
-            <div class="feature-card">
-                <strong style="color: #ffffff !important;">{icon} {example}</strong><br>
-                <small style="color: #cccccc !important;">{description}</small>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # Add helpful tips
-        st.markdown("""
-        <div class="sidebar-content">
-            <h3 style="color: #6c7ce7 !important;">💡 Tips:</h3>
-            <ul style="color: #cccccc !important; font-size: 0.9rem;">
-                <li style="color: #cccccc !important;">Use <span class="math-symbol">√</span> for square roots</li>
-                <li style="color: #cccccc !important;">Use <span class="math-symbol">^</span> for exponents</li>
-                <li style="color: #cccccc !important;">Use <span class="math-symbol">π</span> for pi</li>
-                <li style="color: #cccccc !important;">Natural language is supported!</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+        render_sidebar()
+    problem_type = st.session_state.problem_type
     
     # Enhanced main input area
     st.markdown("<br>", unsafe_allow_html=True)
@@ -248,28 +577,26 @@ def main():
         </div>
         """, unsafe_allow_html=True)
         
-        # Get the random input value if it exists
-        default_value = st.session_state.get('random_input', '')
-        
-        problem_input = st.text_area(
-            "🔤 Type your mathematical problem here:",
-            value=default_value,
-            height=180,
-            placeholder="✨ Example: Solve 2x + 5 = 15 for x\n📐 Try: Find derivative of x³ + 2x²\n∫ Or: Integrate sin(x) dx",
-            help="You can use natural language or mathematical notation. The AI will understand both!"
-        )
+        # The text area is bound to session state so it can be reset without a rerun
+        st.session_state.setdefault("problem_input", "")
         
-        # Clear the random input after it's been used
-        if 'random_input' in st.session_state:
-            del st.session_state.random_input
-        
-        # Enhanced solve button with animation effect
-        solve_button = st.button(
-            "🚀 Solve Problem", 
-            type="primary", 
-            use_container_width=True,
-            help="Click to solve your mathematical problem with step-by-step explanation"
-        )
+        # Input and button live in a form, so typing does not rerun the script until submit
+        with st.form("solve_form", clear_on_submit=False, border=False):
+            problem_input = st.text_area(
+                "🔤 Type your mathematical problem here:",
+                key="problem_input",
+                height=180,
+                placeholder="✨ Example: Solve 2x + 5 = 15 for x\n📐 Try: Find derivative of x³ + 2x²\n∫ Or: Integrate sin(x) dx",
+                help="You can use natural language or mathematical notation. The AI will understand both!"
+            )
+            
+            # Enhanced solve button with animation effect
+            solve_button = st.form_submit_button(
+                "🚀 Solve Problem", 
+                type="primary", 
+                use_container_width=True,
+                help="Click to solve your mathematical problem with step-by-step explanation"
+            )
     
     with col2:
         st.markdown("""
@@ -280,55 +607,9 @@ def main():
         
         col2_1, col2_2 = st.columns(2)
         with col2_1:
-            if st.button("🗑️ Clear", use_container_width=True, help="Clear the input field"):
-                # Clear any existing random input
-                if 'random_input' in st.session_state:
-                    del st.session_state.random_input
-                st.rerun()
+            st.button("🗑️ Clear", use_container_width=True, help="Clear the input field", on_click=clear_input)
         with col2_2:
-            if st.button("🎲 Random", use_container_width=True, help="Try a random example"):
-                import random
-                examples = [
-                    # Algebraic equations
-                    "solve x² + 4x - 5 = 0",
-                    "solve 2x + 10 = 0",
-                    "factor x² - 9",
-                    "solve √(x + 1) = 3",
-                    "simplify (x + 2)(x - 3)",
-                    
-                    # Calculus problems
-                    "find derivative of x³ + 2x²",
-                    "integrate x² dx",
-                    "find derivative of sin(x)",
-                    "integrate cos(x) dx",
-                    
-                    # Word problems - Speed/Distance/Time
-                    "A car travels 120 miles in 3 hours. What is its speed?",
-                    "If a train travels at 60 mph for 2.5 hours, how far does it go?",
-                    
-                    # Word problems - Money
-                    "Sarah buys 3 books for $15 each and 2 pens for $2 each. What is the total cost?",
-                    "A shirt costs $25. If there's a 20% discount, what is the final price?",
-                    
-                    # Word problems - Age
-                    "John is 5 years older than Mary. If Mary is 20 years old, how old is John?",
-                    
-                    # Word problems - Geometry
-                    "What is the area of a rectangle with length 8 feet and width 5 feet?",
-                    "Find the perimeter of a square with side length 7 meters",
-                    
-                    # Word problems - Percentage
-                    "What is 25% of 80?",
-                    "A population of 1000 increases by 15%. What is the new population?",
-                    
-                    # Word problems - General
-                    "If 12 apples cost $6, how much do 8 apples cost?",
-                    
-                    # Complex word problems - Systems of equations
-                    "A boat travels 24 km downstream in 3 hours and the same distance upstream in 4 hours. Find the speed of the boat in still water and the speed of the current.",
-                    "Two numbers sum to 50 and their difference is 10. Find the numbers."
-                ]
-                st.session_state.random_input = random.choice(examples)
+            st.button("🎲 Random", use_container_width=True, help="Try a random example", on_click=load_random_example)
         
         st.markdown("""
         <div class="feature-card">
@@ -362,24 +643,33 @@ def main():
 
     
     # Process the problem when button is clicked
-    if solve_button and problem_input.strip():
+    # Reject malformed input before entering the spinner and loading the solver
+    input_error = check_input(problem_input) if solve_button and problem_input.strip() else None
+    
+    if input_error:
+        st.warning(input_error)
+    
+    elif solve_button and problem_input.strip():
+        # Initialize components only once a problem actually needs solving, so a
+        # failure is reported here; the cached helpers above reuse the same instances
+        try:
+            init_components()
+        except Exception as e:
+            st.error(f"Failed to initialize components: {str(e)}")
+            st.stop()
+        
+        # A new solve replaces whatever solution was shown before
+        st.session_state.pop('last_solution', None)
+        
         with st.spinner("Solving your problem..."):
             try:
                 # Map display names back to internal names
-                type_mapping = {
-                    "🤖 Auto-detect": "Auto-detect",
-                    "🔢 Algebra": "Algebra", 
-                    "📈 Calculus": "Calculus",
-                    "📐 Geometry": "Geometry",
-                    "📝 Word Problem": "Word Problem",
-                    "⚖️ Direct Equation": "Direct Equation"
-                }
-                internal_problem_type = type_mapping.get(problem_type, problem_type)
+                internal_problem_type = PROBLEM_TYPES.get(problem_type, problem_type)
                 
                 # Process the input
-                if internal_problem_type == "Word Problem" or (internal_problem_type == "Auto-detect" and nlp.is_word_problem(problem_input)):
+                if internal_problem_type == "Word Problem" or (internal_problem_type == "Auto-detect" and is_word_problem_cached(problem_input)):
                     # Extract mathematical expression from word problem
-                    extracted_problem = nlp.extract_math_from_text(problem_input)
+                    extracted_problem = extract_math_cached(problem_input)
                     if extracted_problem:
                         st.info(f"Extracted mathematical expression: {extracted_problem}")
                         problem_to_solve = extracted_problem
@@ -389,7 +679,7 @@ def main():
                     problem_to_solve = problem_input
                 
                 # Solve the problem
-                solution = solver.solve_problem(problem_to_solve, internal_problem_type)
+                solution, formatted_solution = solve_and_format_cached(problem_to_solve, internal_problem_type)
                 
                 if solution and "error" not in solution:
                     # Enhanced success message
@@ -402,96 +692,9 @@ def main():
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    # Format and display the solution
-                    formatted_solution = formatter.format_solution(solution)
-                    
-                    # Solution container with enhanced styling
-                    st.markdown('<div class="solution-container">', unsafe_allow_html=True)
-                    
-                    st.markdown("""
-                    <h2 style="color: #6c7ce7; text-align: center; margin-bottom: 2rem;">
-                        📋 Complete Solution
-                    </h2>
-                    """, unsafe_allow_html=True)
-                    
-                    # Display original problem in enhanced format
-                    st.markdown("""
-                    <div style="background: #3a3a3a; padding: 1rem; border-radius: 10px; border-left: 4px solid #6c7ce7; margin-bottom: 1.5rem;">
-                        <h4 style="color: #6c7ce7 !important; margin-bottom: 0.5rem;">📝 Original Problem:</h4>
-                        <div style="background: #2d2d2d; padding: 1rem; border-radius: 8px; font-family: monospace; font-size: 1.1rem; color: #ffffff !important;">
-                    """ + problem_input + """
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Enhanced step-by-step solution
-                    if formatted_solution.get("steps"):
-                        st.markdown("""
-                        <h3 style="color: #6c7ce7; margin: 1.5rem 0 1rem 0;">
-                            🔢 Step-by-Step Solution:
-                        </h3>
-                        """, unsafe_allow_html=True)
-                        
-                        for i, step in enumerate(formatted_solution["steps"], 1):
-                            st.markdown(f"""
-                            <div class="step-card">
-                                <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
-                                    <div style="background: #6c7ce7; color: white; border-radius: 50%; 
-                                                width: 30px; height: 30px; display: flex; align-items: center; 
-                                                justify-content: center; margin-right: 1rem; font-weight: bold;">
-                                        {i}
-                                    </div>
-                                    <div style="font-size: 1.1rem; line-height: 1.4; color: #ffffff !important;">
-                                        {step}
-                                    </div>
-                                </div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                    
-                    # Enhanced final answer display
-                    if formatted_solution.get("answer"):
-                        st.markdown("""
-                        <h3 style="color: #6c7ce7; margin: 1.5rem 0 1rem 0;">
-                            🎯 Final Answer:
-                        </h3>
-                        """, unsafe_allow_html=True)
-                        
-                        st.markdown(f"""
-                        <div class="answer-highlight">
-                            <div style="font-size: 1.5rem; margin-bottom: 0.5rem;">🏆</div>
-                            <div style="font-size: 1.3rem;">{formatted_solution["answer"]}</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    # Enhanced plot display
-                    if formatted_solution.get("plot"):
-                        st.markdown("""
-                        <h3 style="color: #6c7ce7; margin: 1.5rem 0 1rem 0;">
-                            📊 Visualization:
-                        </h3>
-                        """, unsafe_allow_html=True)
-                        
-                        plot_col1, plot_col2, plot_col3 = st.columns([1, 3, 1])
-                        with plot_col2:
-                            st.pyplot(formatted_solution["plot"])
-                    
-                    # Enhanced additional info
-                    if formatted_solution.get("info"):
-                        st.markdown("""
-                        <h3 style="color: #6c7ce7; margin: 1.5rem 0 1rem 0;">
-                            💡 Additional Information:
-                        </h3>
-                        """, unsafe_allow_html=True)
-                        
-                        for info in formatted_solution["info"]:
-                            st.markdown(f"""
-                            <div style="background: #3a3a3a; padding: 1rem; border-radius: 10px; 
-                                        border-left: 4px solid #6c7ce7; margin: 0.5rem 0; color: #ffffff;">
-                                <strong style="color: #ffffff;">💡</strong> <span style="color: #ffffff;">{info}</span>
-                            </div>
-                            """, unsafe_allow_html=True)
-                    
-                    st.markdown('</div>', unsafe_allow_html=True)
+                    # Keep the latest solution in session state so later reruns can redraw it
+                    st.session_state.last_solution = (problem_input, formatted_solution)
+                    render_solution(problem_input, formatted_solution)
                 
                 elif solution and "error" in solution:
                     # Enhanced error display
@@ -505,7 +708,7 @@ def main():
                     
                     st.markdown(f"""
                     <div style="background: #4a3a3a; padding: 1rem; border-radius: 10px; border-left: 4px solid #ff6b6b; margin: 1rem 0; color: #ffffff;">
-                        <strong style="color: #ff6b6b;">❌ Error:</strong> <span style="color: #ffffff;">{solution['error']}</span>
+                        <strong style="color: #ff6b6b;">❌ Error:</strong> <span style="color: #ffffff;">{html.escape(str(solution['error']))}</span>
                     </div>
                     """, unsafe_allow_html=True)
                     
@@ -521,10 +724,10 @@ def main():
                     """, unsafe_allow_html=True)
                     
                     # Show what was processed
-                    st.markdown("""
+                    st.markdown(f"""
                     <div style="background: #3a3a3a; padding: 1rem; border-radius: 10px; margin: 1rem 0; color: #ffffff;">
                         <strong style="color: #ffffff;">🔍 What was processed:</strong><br>
-                        <code style="background: #2d2d2d; color: #ffffff; padding: 0.5rem; border-radius: 5px; display: block; margin-top: 0.5rem;">""" + problem_to_solve + """</code>
+                        <code style="background: #2d2d2d; color: #ffffff; padding: 0.5rem; border-radius: 5px; display: block; margin-top: 0.5rem;">{html.escape(problem_to_solve)}</code>
                     </div>
                     """, unsafe_allow_html=True)
                 
@@ -544,6 +747,10 @@ def main():
                     """, unsafe_allow_html=True)
                     
             except Exception as e:
+                # Format the traceback once, while the exception is still being handled
+                import traceback
+                error_details = traceback.format_exc()
+                
                 st.markdown("""
                 <div style="background: linear-gradient(135deg, #ff6b6b 0%, #ffa726 100%); 
                             color: white; padding: 1rem; border-radius: 15px; text-align: center; 
@@ -554,14 +761,14 @@ def main():
                 
                 st.markdown(f"""
                 <div style="background: #4a3a3a; padding: 1rem; border-radius: 10px; border-left: 4px solid #ff6b6b; margin: 1rem 0; color: #ffffff;">
-                    <strong style="color: #ff6b6b;">❌ Error:</strong> <span style="color: #ffffff;">{str(e)}</span><br>
+                    <strong style="color: #ff6b6b;">❌ Error:</strong> <span style="color: #ffffff;">{html.escape(str(e))}</span><br>
                     <small style="color: #cccccc;">Please check your input format and try again.</small>
                 </div>
                 """, unsafe_allow_html=True)
                 
                 # Show detailed error in expander for debugging
                 with st.expander("🔧 Show detailed error information (for debugging)"):
-                    st.code(traceback.format_exc())
+                    st.code(error_details)
     
     elif solve_button and not problem_input.strip():
         st.markdown("""
@@ -570,37 +777,16 @@ def main():
         </div>
         """, unsafe_allow_html=True)
     
+    elif 'last_solution' in st.session_state:
+        # Keep showing the last solution on reruns triggered by other widgets
+        render_solution(*st.session_state.last_solution)
+    
     # Enhanced Footer
     st.markdown("<br><br>", unsafe_allow_html=True)
-    st.markdown("""
-    <div style="background: linear-gradient(135deg, #4a5bc7 0%, #5a67d8 100%); 
-                color: white; padding: 2rem; border-radius: 20px; margin: 2rem 0; text-align: center;">
-        <h2 style="color: white; margin-bottom: 1.5rem;">📚 How to Use AI Math Solver</h2>
-        <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 1rem; text-align: left;">
-            <div style="background: rgba(255,255,255,0.1); padding: 1rem; border-radius: 10px;">
-                <h4 style="color: #fff; margin-bottom: 0.5rem;">1️⃣ Enter Problem</h4>
-                <p style="color: #f0f0f0; margin: 0; font-size: 0.9rem;">Type your mathematical problem using natural language or mathematical notation</p>
-            </div>
-            <div style="background: rgba(255,255,255,0.1); padding: 1rem; border-radius: 10px;">
-                <h4 style="color: #fff; margin-bottom: 0.5rem;">2️⃣ Select Type</h4>
-                <p style="color: #f0f0f0; margin: 0; font-size: 0.9rem;">Choose problem type or let AI auto-detect it for you</p>
-            </div>
-            <div style="background: rgba(255,255,255,0.1); padding: 1rem; border-radius: 10px;">
-                <h4 style="color: #fff; margin-bottom: 0.5rem;">3️⃣ Solve</h4>
-                <p style="color: #f0f0f0; margin: 0; font-size: 0.9rem;">Click 'Solve Problem' to get detailed step-by-step solutions</p>
-            </div>
-            <div style="background: rgba(255,255,255,0.1); padding: 1rem; border-radius: 10px;">
-                <h4 style="color: #fff; margin-bottom: 0.5rem;">4️⃣ Understand</h4>
-                <p style="color: #f0f0f0; margin: 0; font-size: 0.9rem;">Review the solution with explanations and beautiful mathematical formatting</p>
-            </div>
-        </div>
-        <div style="margin-top: 1.5rem; padding-top: 1rem; border-top: 1px solid rgba(255,255,255,0.2);">
-            <p style="color: #f0f0f0; margin: 0; font-size: 0.9rem;">
-                ✨ Powered by AI • 🧮 Advanced Mathematics • 📊 Beautiful Visualizations
-            </p>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(FOOTER_HTML, unsafe_allow_html=True)
+    
+    # Warm the example solves once the first page is drawn
+    warm_solve_cache()
 
 if __name__ == "__main__":
     main()
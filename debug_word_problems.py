@@ -16,32 +16,33 @@ def debug_word_problems():
     print("🔍 DEBUGGING WORD PROBLEM ISSUES")
     print("=" * 50)
     
-    # Test cases that might have issues
+    # Test cases that might have issues: (problem, expected, text the answer should contain, verdict if it does)
     test_cases = [
         # Simple money problem
-        ("Sarah buys 3 books for $15 each. What is the total cost?", "Expected: 3 × 15 = 45"),
+        ("Sarah buys 3 books for $15 each. What is the total cost?", "Expected: 3 × 15 = 45", "45", "✅ CORRECT"),
         
         # Percentage problem
-        ("What is 25% of 80?", "Expected: 0.25 × 80 = 20"),
+        ("What is 25% of 80?", "Expected: 0.25 × 80 = 20", "20", "✅ CORRECT"),
         
         # Speed problem
-        ("A car travels 120 miles in 3 hours. What is its speed?", "Expected: 120 ÷ 3 = 40"),
+        ("A car travels 120 miles in 3 hours. What is its speed?", "Expected: 120 ÷ 3 = 40", "40", "✅ CORRECT"),
         
         # Age problem
-        ("John is 5 years older than Mary. If Mary is 20 years old, how old is John?", "Expected: 20 + 5 = 25"),
+        ("John is 5 years older than Mary. If Mary is 20 years old, how old is John?", "Expected: 20 + 5 = 25", "25", "✅ CORRECT"),
         
         # Geometry problem
-        ("What is the area of a rectangle with length 8 feet and width 5 feet?", "Expected: 8 × 5 = 40"),
+        ("What is the area of a rectangle with length 8 feet and width 5 feet?", "Expected: 8 × 5 = 40", "40", "✅ CORRECT"),
         
         # Discount problem
-        ("A shirt costs $25. If there's a 20% discount, what is the final price?", "Expected: 25 × (1 - 0.20) = 20"),
+        ("A shirt costs $25. If there's a 20% discount, what is the final price?", "Expected: 25 × (1 - 0.20) = 20", "20", "⚠️ MIGHT BE WRONG - should be 20, not 500"),
         
         # Boat problem
-        ("A boat travels 24 km downstream in 3 hours and the same distance upstream in 4 hours. Find the speed of the boat in still water and the speed of the current.", "Expected: boat=7, current=1"),
+        ("A boat travels 24 km downstream in 3 hours and the same distance upstream in 4 hours. Find the speed of the boat in still water and the speed of the current.", "Expected: boat=7, current=1", "7", "✅ CORRECT"),
     ]
     
-    for i, (problem, expected) in enumerate(test_cases, 1):
+    for i, (problem, expected, expected_text, verdict) in enumerate(test_cases, 1):
         print(f"\n🧪 TEST {i}: {problem[:50]}...")
+        problem_lower = problem.lower()
         print(f"Expected: {expected}")
         
         # Step 1: Check detection
@@ -61,11 +62,11 @@ def debug_word_problems():
             continue
             
         # Step 3: Check numbers extraction
-        numbers = nlp._extract_numbers(problem.lower())
+        numbers = nlp._extract_numbers(problem_lower)
         print(f"Numbers found: {numbers}")
         
         # Step 4: Check problem type identification
-        problem_type = nlp._identify_problem_type(problem.lower())
+        problem_type = nlp._identify_problem_type(problem_lower)
         print(f"Problem type: {problem_type}")
         
         # Step 5: Solve and check result
@@ -77,22 +78,7 @@ def debug_word_problems():
                 print(f"Actual answer: {answer}")
                 
                 # Simple validation
-                if "45" in str(answer) and "books" in problem:
-                    print("✅ CORRECT")
-                elif "20" in str(answer) and "25%" in problem:
-                    print("✅ CORRECT") 
-                elif "40" in str(answer) and "120 miles" in problem:
-                    print("✅ CORRECT")
-                elif "25" in str(answer) and "John" in problem:
-                    print("✅ CORRECT")
-                elif "40" in str(answer) and "rectangle" in problem:
-                    print("✅ CORRECT")
-                elif "20" in str(answer) and "discount" in problem:
-                    print("⚠️ MIGHT BE WRONG - should be 20, not 500")
-                elif "7" in str(answer) and "boat" in problem:
-                    print("✅ CORRECT")
-                else:
-                    print("❌ POSSIBLY INCORRECT")
+                print(verdict if expected_text in str(answer) else "❌ POSSIBLY INCORRECT")
                     
             else:
                 error = solution.get('error', 'Unknown error') if solution else 'No solution'
@@ -1,15 +1,152 @@
 import sympy as sp
 import numpy as np
-from sympy import symbols, solve, diff, integrate, simplify, expand, factor, limit, series
+from sympy import symbols, solve, diff, integrate, simplify, expand, factor, cancel, limit, series, Poly, linsolve
 from sympy.parsing.sympy_parser import parse_expr
-from sympy.plotting import plot
-import matplotlib.pyplot as plt
 import re
+import ast
+import operator
+from fractions import Fraction
+from functools import lru_cache
+
+# Command words stripped from the front of the input, applied in this order
+LEADING_COMMANDS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'^calculate\s+', r'^what is\s+', r'^find\s+', r'^solve\s+'
+))
+
+# Math symbols rewritten in SymPy syntax, applied in a single pass
+NOTATION_TABLE = str.maketrans({
+    "^": "**",  # Power notation
+    "÷": "/",   # Division symbol
+    "×": "*",   # Multiplication symbol
+    "π": "pi",  # Pi symbol
+    "∞": "oo"   # Infinity symbol
+})
+
+SQRT_SYMBOL = re.compile(r'√\(([^)]+)\)')
+# Places that take an implicit "*": 2x, x2 and )(
+IMPLICIT_MULTIPLICATION = re.compile(r'(?<=\d)(?=[a-zA-Z])|(?<=[a-zA-Z])(?=\d)|(?<=\))(?=\()')
+
+SINGLE_LETTER = re.compile(r'\b[a-zA-Z]\b')
+ARITHMETIC_ONLY = re.compile(r'^[\d\+\-\*/\(\)\.\s]+$')
+
+# Keywords for problem type detection and routing, all found in a single scan; the
+# group name says what each one asks for ("antiderivative" is caught by "derivative")
+PROBLEM_KEYWORDS = re.compile(
+    r'(?P<solve>solve)|(?P<find>find x|find y)'
+    r'|(?P<derivative>derivative|differentiate|d/dx)|(?P<derive>derive)'
+    r'|(?P<integral>integrate|integral|∫)'
+)
+CALCULUS_KINDS = frozenset({'derivative', 'derive', 'integral'})
+ALGEBRA_KINDS = frozenset({'solve', 'find'})
+
+# "... for y" suffix naming the variable to solve for
+FOR_VARIABLE = re.compile(r'\s+for\s+(\w+)$', re.IGNORECASE)
+SOLVE_PREFIX = re.compile(r'^solve\s+', re.IGNORECASE)
+DERIVATIVE_REQUEST = re.compile(r'(?:derivative of|differentiate|d/dx)\s*(.+?)(?:\s+with respect to\s+(\w+))?$')
+INTEGRAL_REQUEST = re.compile(r'(?:integrate|integral of)\s*(.+?)(?:\s+d(\w+)|\s+with respect to\s+(\w+))?$')
+
+# Most lambdified plot functions kept per solver
+NUMERIC_FUNCTION_LIMIT = 256
+
+@lru_cache(maxsize=1024)
+def parse_cached(text):
+    """Parse an expression string with SymPy, reusing the result for repeated strings"""
+    # SymPy expressions are immutable, so sharing one parsed result is safe
+    return parse_expr(text)
+
+@lru_cache(maxsize=64)
+def symbol_cached(name):
+    """Create a SymPy symbol, reusing the object for names seen before"""
+    return symbols(name)
+
+def _is_exact_linear(equation, variables):
+    """Check whether an equation is linear in the variables with exact coefficients"""
+    return (not equation.has(sp.Float) and equation.is_polynomial(*variables)
+            and Poly(equation, *variables).is_linear)
+
+@lru_cache(maxsize=512)
+def _cached_solutions(equations, variables):
+    """Run SymPy's solve; a tuple of variables marks a system of equations"""
+    if isinstance(variables, tuple):
+        if all(_is_exact_linear(equation, variables) for equation in equations):
+            # Gauss-Jordan elimination skips solve's general dispatch
+            solution_set = linsolve(list(equations), list(variables))
+            if not solution_set:
+                return []
+            (values,) = solution_set
+            if not any(value.free_symbols for value in values):
+                # A unique solution, keyed in name order like solve's dict
+                return dict(sorted(zip(variables, values), key=lambda pair: pair[0].name))
+            # Infinitely many solutions keep solve's form, which names the free variables
+        return solve(list(equations), list(variables))
+    if isinstance(equations, sp.Expr):
+        poly = equations.as_poly(variables)
+        if poly is not None and poly.degree() == 1 and (poly.domain.is_ZZ or poly.domain.is_QQ):
+            # A linear equation with rational coefficients has its one root by a single division
+            return [-poly.nth(0) / poly.nth(1)]
+    return solve(equations, variables)
+
+def solve_cached(equations, variables):
+    """Solve with SymPy, reusing the solutions for an equation solved before"""
+    # Expressions hash structurally, so equal equations share one cache entry.
+    # The containers are copied so callers can't change the cached solutions.
+    try:
+        hash(equations)
+    except TypeError:
+        # Lists and mutable matrices can't key the cache; solve them directly
+        return solve(equations, variables)
+    solutions = _cached_solutions(equations, variables)
+    if isinstance(solutions, dict):
+        return dict(solutions)
+    if isinstance(solutions, list):
+        return [dict(solution) if isinstance(solution, dict) else solution for solution in solutions]
+    # Anything else (e.g. the And of an inequality's solution) is an immutable SymPy object
+    return solutions
+
+@lru_cache(maxsize=16)
+def plot_grid(start, stop):
+    """Return the x sample points for a plot range, building each grid only once"""
+    # 400 samples is already smooth at the plot's figure size
+    grid = np.linspace(start, stop, 400, dtype=np.float64)
+    # Read-only, since every plot of this range shares the array
+    grid.flags.writeable = False
+    return grid
+
+# Largest exponent the arithmetic fast path raises to; bigger powers are left to SymPy
+POWER_EXPONENT_LIMIT = 1000
+# Largest exact result, in bits, the fast path computes; a float result beyond
+# about 1024 bits overflows anyway, so this only keeps exact intermediates cheap
+POWER_RESULT_BITS = 4096
+
+def bounded_power(base, exponent):
+    """Raise base to exponent, refusing powers whose exponent or exact result is too large"""
+    if abs(exponent) > POWER_EXPONENT_LIMIT:
+        raise ValueError("exponent too large for plain arithmetic")
+    # Bound the result size too, since nested powers grow the base without limit:
+    # an exact result has about |exponent| * log2(|base|) bits
+    if isinstance(base, Fraction):
+        base_bits = max(base.numerator.bit_length(), base.denominator.bit_length())
+        if abs(exponent) * base_bits > POWER_RESULT_BITS:
+            raise ValueError("power too large for plain arithmetic")
+    return base ** exponent
 
 class MathSolver:
+    # Operators allowed on the plain-arithmetic fast path
+    _ARITHMETIC_OPS = {
+        ast.Add: operator.add,
+        ast.Sub: operator.sub,
+        ast.Mult: operator.mul,
+        ast.Div: operator.truediv,
+        ast.Pow: bounded_power,
+        ast.UAdd: operator.pos,
+        ast.USub: operator.neg
+    }
+    
     def __init__(self):
         """Initialize the math solver"""
-        pass
+        # Numeric functions of recently plotted expressions; lru_cache evicts the least
+        # recently used one and, unlike a hand-rolled dict, is safe to share across threads
+        self._numeric_function = lru_cache(maxsize=NUMERIC_FUNCTION_LIMIT)(self._build_numeric_function)
         
     def solve_problem(self, problem_text, problem_type="Auto-detect"):
         """
@@ -19,20 +156,24 @@ class MathSolver:
             # Clean and preprocess the input
             cleaned_problem = self._preprocess_input(problem_text)
             
-            # Determine the type of problem if auto-detect is selected
-            if problem_type == "Auto-detect":
-                problem_type = self._detect_problem_type(cleaned_problem)
-            
-            # Check if this is a simple calculation (not an equation to solve)
+            # Check if this is a simple calculation (not an equation to solve);
+            # plain arithmetic is answered before any type detection or SymPy work
             if self._is_simple_calculation(cleaned_problem):
                 return self._evaluate_expression(cleaned_problem)
             
+            # One scan finds the kinds of keyword used, for detection and routing alike
+            keyword_kinds = {match.lastgroup for match in PROBLEM_KEYWORDS.finditer(cleaned_problem.lower())}
+            
+            # Determine the type of problem if auto-detect is selected
+            if problem_type == "Auto-detect":
+                problem_type = self._detect_problem_type(cleaned_problem, keyword_kinds)
+            
             # Route to appropriate solver based on problem type
-            if problem_type == "Algebra" or "solve" in cleaned_problem.lower():
+            if problem_type == "Algebra" or "solve" in keyword_kinds:
                 return self._solve_algebraic(cleaned_problem)
-            elif problem_type == "Calculus" or any(keyword in cleaned_problem.lower() for keyword in ["derivative", "differentiate", "d/dx"]):
+            elif problem_type == "Calculus" or "derivative" in keyword_kinds:
                 return self._solve_calculus_derivative(cleaned_problem)
-            elif problem_type == "Calculus" or any(keyword in cleaned_problem.lower() for keyword in ["integrate", "integral", "∫"]):
+            elif "integral" in keyword_kinds:
                 return self._solve_calculus_integral(cleaned_problem)
             elif self._is_system_of_equations(cleaned_problem):
                 return self._solve_system_of_equations(cleaned_problem)
@@ -49,7 +190,9 @@ class MathSolver:
                 "answer": "Could not solve the problem"
             }
     
-    def _preprocess_input(self, text):
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _preprocess_input(text):
         """Clean and preprocess the input text"""
         # Convert to string and strip whitespace
         text = str(text).strip()
@@ -58,23 +201,15 @@ class MathSolver:
         text = ''.join(char for char in text if char.isprintable() or char.isspace())
         
         # Handle command words that precede expressions
-        text = re.sub(r'^calculate\s+', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'^what is\s+', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'^find\s+', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'^solve\s+', '', text, flags=re.IGNORECASE)
+        for command in LEADING_COMMANDS:
+            text = command.sub('', text)
         
         # Replace common mathematical notations
-        text = text.replace("^", "**")  # Convert power notation
-        text = text.replace("÷", "/")   # Division symbol
-        text = text.replace("×", "*")   # Multiplication symbol
-        text = text.replace("π", "pi")  # Pi symbol
-        text = text.replace("∞", "oo")  # Infinity symbol
-        text = re.sub(r'√\(([^)]+)\)', r'sqrt(\1)', text)  # Convert √ to sqrt for parsing
+        text = text.translate(NOTATION_TABLE)
+        text = SQRT_SYMBOL.sub(r'sqrt(\1)', text)  # Convert √ to sqrt for parsing
         
-        # Handle common input formats
-        text = re.sub(r'(\d)([a-zA-Z])', r'\1*\2', text)  # Add multiplication: 2x -> 2*x
-        text = re.sub(r'([a-zA-Z])(\d)', r'\1*\2', text)  # Add multiplication: x2 -> x*2
-        text = re.sub(r'\)\(', ')*(', text)  # Add multiplication between parentheses
+        # Handle common input formats; one pass adds multiplication: 2x -> 2*x, x2 -> x*2, )( -> )*(
+        text = IMPLICIT_MULTIPLICATION.sub('*', text)
         
         # Remove extra whitespace
         text = " ".join(text.split())
@@ -84,17 +219,19 @@ class MathSolver:
     def _is_simple_calculation(self, problem_text):
         """Check if this is a simple calculation rather than an equation to solve"""
         # If no equals sign and no variables, it's likely a calculation
-        if "=" not in problem_text and not re.search(r'\b[a-zA-Z]\b', problem_text):
+        if "=" not in problem_text and not SINGLE_LETTER.search(problem_text):
             # Check if it contains only numbers and operators
-            if re.match(r'^[\d\+\-\*/\(\)\.\s]+$', problem_text):
+            if ARITHMETIC_ONLY.match(problem_text):
                 return True
         return False
     
     def _evaluate_expression(self, expression_text):
         """Evaluate a simple mathematical expression"""
         try:
-            expr = parse_expr(expression_text)
-            result = float(expr.evalf())
+            result = self._evaluate_arithmetic(expression_text)
+            if result is None:
+                expr = parse_cached(expression_text)
+                result = float(expr.evalf())
             
             steps = [
                 f"Evaluating: {expression_text}",
@@ -110,15 +247,32 @@ class MathSolver:
         except Exception as e:
             return {"error": f"Could not evaluate expression: {str(e)}"}
     
-    def _detect_problem_type(self, problem_text):
-        """Detect the type of mathematical problem"""
-        problem_lower = problem_text.lower()
+    def _evaluate_arithmetic(self, expression_text):
+        """
+        Evaluate numbers joined by + - * / ** without SymPy.
+        Returns None when the expression needs SymPy (anything else, or division by zero).
+        """
+        def evaluate(node):
+            if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+                # Integers stay exact like SymPy Integers; decimals are machine floats like SymPy Floats
+                return Fraction(node.value) if type(node.value) is int else node.value
+            if isinstance(node, ast.BinOp) and type(node.op) in self._ARITHMETIC_OPS:
+                return self._ARITHMETIC_OPS[type(node.op)](evaluate(node.left), evaluate(node.right))
+            if isinstance(node, ast.UnaryOp) and type(node.op) in self._ARITHMETIC_OPS:
+                return self._ARITHMETIC_OPS[type(node.op)](evaluate(node.operand))
+            raise ValueError("not plain arithmetic")
         
-        if any(keyword in problem_lower for keyword in ["derivative", "differentiate", "d/dx", "derive"]):
-            return "Calculus"
-        elif any(keyword in problem_lower for keyword in ["integrate", "integral", "∫", "antiderivative"]):
+        try:
+            return float(evaluate(ast.parse(expression_text.strip(), mode='eval').body))
+        except (SyntaxError, ValueError, TypeError, ZeroDivisionError, OverflowError, RecursionError):
+            # TypeError covers powers with a complex result, which float() rejects
+            return None
+    
+    def _detect_problem_type(self, problem_text, keyword_kinds):
+        """Detect the type of mathematical problem from the PROBLEM_KEYWORDS kinds it uses"""
+        if not CALCULUS_KINDS.isdisjoint(keyword_kinds):
             return "Calculus"
-        elif any(keyword in problem_lower for keyword in ["solve", "find x", "find y"]):
+        elif not ALGEBRA_KINDS.isdisjoint(keyword_kinds):
             return "Algebra"
         elif "=" in problem_text:
             return "Direct Equation"
@@ -133,14 +287,14 @@ class MathSolver:
             var_str = 'x'
             
             # Handle "solve ... for variable" pattern
-            for_match = re.search(r'\s+for\s+(\w+)$', problem_text.lower())
+            for_match = FOR_VARIABLE.search(problem_text.lower())
             if for_match:
                 var_str = for_match.group(1)
                 # Remove the "for variable" part from the equation
-                equation_str = re.sub(r'\s+for\s+\w+$', '', problem_text, flags=re.IGNORECASE).strip()
+                equation_str = FOR_VARIABLE.sub('', problem_text).strip()
             
             # Remove "solve" from the beginning if present
-            equation_str = re.sub(r'^solve\s+', '', equation_str, flags=re.IGNORECASE).strip()
+            equation_str = SOLVE_PREFIX.sub('', equation_str).strip()
             
             # Validate that we have something to work with
             if not equation_str:
@@ -153,22 +307,21 @@ class MathSolver:
             if '=' in equation_str:
                 left, right = equation_str.split('=', 1)
                 try:
-                    left_expr = parse_expr(left.strip())
-                    right_expr = parse_expr(right.strip())
-                    equation = left_expr - right_expr
+                    # Parse both sides as one "left - right" expression
+                    equation = parse_cached(f"({left.strip()}) - ({right.strip()})")
                 except Exception as parse_error:
                     return {"error": f"Failed to parse equation '{equation_str}': {str(parse_error)}. Please check your equation format."}
             else:
                 try:
-                    equation = parse_expr(equation_str)
+                    equation = parse_cached(equation_str)
                 except Exception as parse_error:
                     return {"error": f"Failed to parse expression '{equation_str}': {str(parse_error)}. Please check your equation format."}
             
             # Get the variable to solve for
-            var = symbols(var_str)
+            var = symbol_cached(var_str)
             
             # Solve the equation
-            solutions = solve(equation, var)
+            solutions = solve_cached(equation, var)
             
             steps = [
                 f"Original problem: {problem_text}",
@@ -178,8 +331,10 @@ class MathSolver:
             ]
             
             if solutions:
-                steps.append(f"Solutions found: {solutions}")
-                answer = f"{var_str} = {solutions}"
+                # Print the solutions once; the step and the answer share the text
+                solutions_text = str(solutions)
+                steps.append(f"Solutions found: {solutions_text}")
+                answer = f"{var_str} = {solutions_text}"
             else:
                 steps.append("No real solutions found")
                 answer = "No real solutions"
@@ -202,42 +357,40 @@ class MathSolver:
             var_str = 'x'
             
             # Handle "solve ... for variable" pattern
-            for_match = re.search(r'\s+for\s+(\w+)$', equation_text.lower())
+            for_match = FOR_VARIABLE.search(equation_text.lower())
             if for_match:
                 var_str = for_match.group(1)
                 # Remove the "for variable" part from the equation
-                equation_str = re.sub(r'\s+for\s+\w+$', '', equation_text, flags=re.IGNORECASE).strip()
+                equation_str = FOR_VARIABLE.sub('', equation_text).strip()
             
             if '=' not in equation_str:
                 return {"error": "No equation found (missing '=' sign)"}
             
             left, right = equation_str.split('=', 1)
             try:
-                left_expr = parse_expr(left.strip())
-                right_expr = parse_expr(right.strip())
+                # Parse both sides as one "left - right" expression
+                equation = parse_cached(f"({left.strip()}) - ({right.strip()})")
             except Exception as parse_error:
                 return {"error": f"Failed to parse equation '{equation_str}': {str(parse_error)}. Please check your equation format."}
             
-            equation = left_expr - right_expr
-            
             # Find all symbols in the equation
             free_symbols = equation.free_symbols
             
             if not free_symbols:
                 # No variables, just check if equation is true
-                result = left_expr.equals(right_expr)
+                result = equation.equals(0)
                 return {
                     "steps": [f"Evaluating: {left.strip()} = {right.strip()}"],
                     "answer": f"The equation is {'True' if result else 'False'}",
                     "type": "evaluation"
                 }
             
-            # Solve for each variable
+            # Solve for each variable, in name order so the output is the same on every run
             solutions = {}
-            for var in free_symbols:
-                var_solutions = solve(equation, var)
+            for var in sorted(free_symbols, key=lambda symbol: symbol.name):
+                var_solutions = solve_cached(equation, var)
                 if var_solutions:
-                    solutions[str(var)] = var_solutions
+                    solutions[var.name] = var_solutions
             
             steps = [
                 f"Original equation: {equation_str}",
@@ -245,9 +398,11 @@ class MathSolver:
             ]
             
             if solutions:
-                for var, sols in solutions.items():
+                # Print each solution list once; the steps and the answer share the text
+                solutions_text = {var: str(sols) for var, sols in solutions.items()}
+                for var, sols in solutions_text.items():
                     steps.append(f"Solutions for {var}: {sols}")
-                answer = "; ".join([f"{var} = {sols}" for var, sols in solutions.items()])
+                answer = "; ".join([f"{var} = {sols}" for var, sols in solutions_text.items()])
             else:
                 steps.append("No solutions found")
                 answer = "No solutions"
@@ -266,7 +421,7 @@ class MathSolver:
         """Solve calculus derivative problems"""
         try:
             # Extract function from text
-            func_match = re.search(r'(?:derivative of|differentiate|d/dx)\s*(.+?)(?:\s+with respect to\s+(\w+))?$', problem_text.lower())
+            func_match = DERIVATIVE_REQUEST.search(problem_text.lower())
             if func_match:
                 func_str = func_match.group(1)
                 var_str = func_match.group(2) if func_match.group(2) else 'x'
@@ -275,23 +430,33 @@ class MathSolver:
                 var_str = 'x'
             
             # Parse the function
-            func = parse_expr(func_str)
-            var = symbols(var_str)
+            func = parse_cached(func_str)
+            var = symbol_cached(var_str)
             
             # Calculate derivative
             derivative = diff(func, var)
-            simplified_derivative = simplify(derivative)
+            # simplify() is slow, so it is left for results the cheaper forms don't cover:
+            # a polynomial is kept as diff() returns it, and a rational function is
+            # cancelled into one fraction when that is smaller than diff()'s form
+            if derivative.is_polynomial(var):
+                simplified_derivative = derivative
+            elif derivative.is_rational_function(var):
+                cancelled = cancel(derivative)
+                simplified_derivative = cancelled if cancelled.count_ops() < derivative.count_ops() else derivative
+            else:
+                simplified_derivative = simplify(derivative)
             
+            answer = f"f'({var_str}) = {simplified_derivative}"
             steps = [
                 f"Find the derivative of: f({var_str}) = {func}",
                 f"Using differentiation rules...",
                 f"f'({var_str}) = {derivative}",
-                f"Simplified: f'({var_str}) = {simplified_derivative}"
+                f"Simplified: {answer}"
             ]
             
             return {
                 "steps": steps,
-                "answer": f"f'({var_str}) = {simplified_derivative}",
+                "answer": answer,
                 "derivative": simplified_derivative,
                 "original_function": func,
                 "type": "derivative"
@@ -304,7 +469,7 @@ class MathSolver:
         """Solve calculus integral problems"""
         try:
             # Extract function from text
-            func_match = re.search(r'(?:integrate|integral of)\s*(.+?)(?:\s+d(\w+)|\s+with respect to\s+(\w+))?$', problem_text.lower())
+            func_match = INTEGRAL_REQUEST.search(problem_text.lower())
             if func_match:
                 func_str = func_match.group(1)
                 var_str = func_match.group(2) or func_match.group(3) or 'x'
@@ -313,21 +478,24 @@ class MathSolver:
                 var_str = 'x'
             
             # Parse the function
-            func = parse_expr(func_str)
-            var = symbols(var_str)
+            func = parse_cached(func_str)
+            var = symbol_cached(var_str)
             
             # Calculate integral
             integral_result = integrate(func, var)
             
+            # Print the function and result once; the steps and the answer share the text
+            integral_text = f"∫ {func} d{var_str}"
+            answer = f"{integral_text} = {integral_result} + C"
             steps = [
-                f"Find the integral of: ∫ {func} d{var_str}",
+                f"Find the integral of: {integral_text}",
                 f"Using integration rules...",
-                f"∫ {func} d{var_str} = {integral_result} + C"
+                answer
             ]
             
             return {
                 "steps": steps,
-                "answer": f"∫ {func} d{var_str} = {integral_result} + C",
+                "answer": answer,
                 "integral": integral_result,
                 "original_function": func,
                 "type": "integral"
@@ -339,22 +507,26 @@ class MathSolver:
     def _solve_general_expression(self, problem_text):
         """Solve general mathematical expressions"""
         try:
-            expr = parse_expr(problem_text)
+            expr = parse_cached(problem_text)
             
-            # Try to simplify
-            simplified = simplify(expr)
-            
-            # Try to factor
-            try:
-                factored = factor(expr)
-            except:
-                factored = None
-            
-            # Try to expand
-            try:
-                expanded = expand(expr)
-            except:
-                expanded = None
+            if expr.is_Atom:
+                # A lone number, constant or symbol has no other form to find
+                simplified = factored = expanded = expr
+            else:
+                # Try to simplify
+                simplified = simplify(expr)
+                
+                # Try to factor
+                try:
+                    factored = factor(expr)
+                except (sp.PolynomialError, NotImplementedError, ValueError, TypeError):
+                    factored = None
+                
+                # Try to expand
+                try:
+                    expanded = expand(expr)
+                except (sp.PolynomialError, NotImplementedError, ValueError, TypeError):
+                    expanded = None
             
             steps = [f"Original expression: {expr}"]
             
@@ -373,7 +545,8 @@ class MathSolver:
                     numeric_value = float(expr.evalf())
                     steps.append(f"Numerical value: {numeric_value}")
                     answer = f"{numeric_value}"
-                except:
+                except (TypeError, ValueError):
+                    # Complex or undefined values have no float form
                     answer = f"{simplified}"
             else:
                 answer = f"{simplified}"
@@ -393,18 +566,24 @@ class MathSolver:
     def create_plot(self, expression, variable='x', x_range=(-10, 10)):
         """Create a plot for mathematical expressions"""
         try:
-            var = symbols(variable)
-            expr = parse_expr(str(expression))
+            var = symbol_cached(variable)
+            expr = parse_cached(str(expression))
             
-            # Create matplotlib figure
-            fig, ax = plt.subplots(figsize=(10, 6))
+            # Imported here so solving without plotting never loads matplotlib
+            from matplotlib.figure import Figure
+            
+            # Create a standalone figure; unlike pyplot figures it is not registered
+            # globally, so it needs no closing and is safe to build from any thread
+            fig = Figure(figsize=(10, 6))
+            ax = fig.subplots()
             
             # Generate x values
-            x_vals = np.linspace(x_range[0], x_range[1], 1000)
+            x_vals = plot_grid(*x_range)
             
             # Convert sympy expression to numpy function
-            func = sp.lambdify(var, expr, 'numpy')
-            y_vals = func(x_vals)
+            func = self._numeric_function(expr, var)
+            # Constant expressions come back as a scalar; stretch them to the x grid
+            y_vals = np.broadcast_to(np.asarray(func(x_vals), dtype=np.float64), x_vals.shape)
             
             # Plot
             ax.plot(x_vals, y_vals, 'b-', linewidth=2, label=f'y = {expr}')
@@ -421,6 +600,15 @@ class MathSolver:
         except Exception as e:
             return None
     
+    def _build_numeric_function(self, expr, var):
+        """Build a numpy function for the expression"""
+        if expr.free_symbols <= {var} and expr.is_polynomial(var):
+            # Polynomials are evaluated by Horner's rule on their float coefficients
+            coefficients = [float(c) for c in reversed(Poly(expr, var).all_coeffs())]
+            return np.polynomial.Polynomial(coefficients)
+        # cse=True evaluates repeated subexpressions once per call
+        return sp.lambdify(var, expr, 'numpy', cse=True)
+    
     def _is_system_of_equations(self, problem_text):
         """Check if the problem contains a system of equations"""
         # Look for multiple equations separated by commas or "and"
@@ -447,9 +635,7 @@ class MathSolver:
                     
                 left, right = eq_str.split('=', 1)
                 try:
-                    left_expr = parse_expr(left.strip())
-                    right_expr = parse_expr(right.strip())
-                    equation = left_expr - right_expr
+                    equation = parse_cached(f"({left.strip()}) - ({right.strip()})")
                     equations.append(equation)
                     variables.update(equation.free_symbols)
                     steps.append(f"Equation {i}: {eq_str}")
@@ -462,9 +648,11 @@ class MathSolver:
             if not variables:
                 return {"error": "No variables found in the system"}
             
-            # Solve the system
+            # Solve the system, with the variables in name order so the output and
+            # the cache key are the same on every run
+            variables = tuple(sorted(variables, key=lambda symbol: symbol.name))
             try:
-                solutions = solve(equations, list(variables))
+                solutions = solve_cached(tuple(equations), variables)
                 steps.append(f"Solving for variables: {', '.join(str(v) for v in variables)}")
                 
                 if not solutions:
@@ -1,70 +1,139 @@
 import re
 import sympy as sp
 from sympy.parsing.sympy_parser import parse_expr
+from functools import lru_cache
+
+# Number patterns: plain and decimal numbers, "3/4" fractions, "25%" percentages
+DIGIT_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+FRACTION = re.compile(r'(\d+)/(\d+)')
+PERCENTAGE = re.compile(r'(\d+(?:\.\d+)?)%')
+NON_WORD_CHARS = re.compile(r'[^\w]')
+
+# Relationship phrases such as "twice as many as" or "has 5 more than"
+TWICE_RELATION = re.compile(r'twice as many.*as|has twice')
+TRIPLE_RELATION = re.compile(r'three times.*as|triple.*as')
+HALF_RELATION = re.compile(r'half.*as|half of')
+MORE_THAN_RELATION = re.compile(r'(\w+) has (\d+) more than (\w+)')
+
+# Verb that splits a sentence into the two sides of an equation
+EQUATION_VERB = re.compile(r'\s+(?:is|equals|=)\s+')
+
+def keyword_pattern(*keywords):
+    """Compile keywords into one regex that finds any of them as a substring"""
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+
+# Keyword groups tried in order by _identify_problem_type
+COMPLEX_MOTION_KEYWORDS = keyword_pattern('upstream', 'downstream', 'current', 'still water', 'wind')
+MOTION_KEYWORDS = keyword_pattern('speed', 'miles', 'hours', 'mph', 'km/h', 'travels', 'distance', 'far', 'velocity', 'acceleration')
+AGE_KEYWORDS = keyword_pattern('years old', 'age', 'older', 'younger', 'born')
+MONEY_KEYWORDS = keyword_pattern('dollars', 'cents', 'money', 'cost', 'price', 'buy', 'sell', 'profit', 'discount', 'budget', 'earn', 'spend')
+GEOMETRY_KEYWORDS = keyword_pattern('rectangle', 'square', 'circle', 'triangle', 'area', 'perimeter', 'volume', 'length', 'width', 'height', 'radius')
+PERCENTAGE_KEYWORDS = keyword_pattern('percent', '%', 'percentage', 'ratio', 'proportion', 'rate')
+MIXTURE_KEYWORDS = keyword_pattern('mixture', 'solution', 'concentration', 'pure', 'dilute', 'mix')
+WORK_KEYWORDS = keyword_pattern('work', 'job', 'complete', 'finish', 'together', 'alone', 'rate of work')
+SYSTEM_PHRASES = keyword_pattern('two numbers', 'find the numbers', 'sum and difference', 'sum to')
+SYSTEM_KEYWORDS = keyword_pattern('difference', 'sum')
+NUMBER_KEYWORDS = keyword_pattern('consecutive', 'number', 'sum', 'product', 'difference', 'twice', 'half', 'triple')
+GROWTH_KEYWORDS = keyword_pattern('population', 'growth', 'increase', 'decrease', 'double', 'triple')
+CALCULATION_KEYWORDS = keyword_pattern('calculate', 'what is', 'find', 'determine')
+VARIABLE_KEYWORDS = keyword_pattern('x', 'unknown', 'variable', 'equals', 'is equal')
 
 class NLPProcessor:
+    # Word-problem vocabulary and its compiled patterns, built once and shared by every instance
+    number_words = {
+        'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+        'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+        'eleven': 11, 'twelve': 12, 'thirteen': 13, 'fourteen': 14, 'fifteen': 15,
+        'sixteen': 16, 'seventeen': 17, 'eighteen': 18, 'nineteen': 19, 'twenty': 20,
+        'thirty': 30, 'forty': 40, 'fifty': 50, 'sixty': 60, 'seventy': 70,
+        'eighty': 80, 'ninety': 90, 'hundred': 100, 'thousand': 1000, 'million': 1000000
+    }
+    
+    operation_keywords = {
+        'addition': ['+', 'plus', 'add', 'sum', 'total', 'combined', 'altogether', 'increased by'],
+        'subtraction': ['-', 'minus', 'subtract', 'difference', 'less than', 'decreased by', 'reduced by'],
+        'multiplication': ['*', 'times', 'multiply', 'product', 'of', 'twice', 'double', 'triple'],
+        'division': ['/', 'divide', 'divided by', 'quotient', 'per', 'ratio', 'split', 'share'],
+        'equals': ['=', 'equals', 'is', 'are', 'makes', 'gives', 'results in']
+    }
+    
+    # Enhanced narrative indicators for better detection
+    narrative_indicators = (
+        # People and objects
+        'a car', 'a person', 'john', 'mary', 'the train', 'the bus', 'a store', 'a student',
+        'a teacher', 'a worker', 'sarah', 'mike', 'a farmer', 'a builder', 'the company',
+        
+        # Question words and phrases
+        'if', 'when', 'how much', 'how many', 'what is', 'find', 'calculate', 'determine',
+        'how old', 'how long', 'how far', 'how fast', 'how tall', 'how wide',
+        
+        # Time and measurement units
+        'years old', 'miles', 'hours', 'minutes', 'seconds', 'days', 'weeks', 'months',
+        'feet', 'meters', 'inches', 'centimeters', 'kilometers', 'yards',
+        
+        # Money and commerce
+        'dollars', 'cents', 'price', 'cost', 'buy', 'sell', 'profit', 'discount', 'sale',
+        'budget', 'spend', 'earn', 'save', 'total cost', 'change',
+        
+        # Motion and physics
+        'speed', 'rate', 'time', 'distance', 'travels', 'drives', 'walks', 'runs',
+        'acceleration', 'velocity', 'moves',
+        
+        # Geometry and shapes
+        'rectangle', 'square', 'circle', 'triangle', 'area', 'perimeter', 'volume',
+        'length', 'width', 'height', 'radius', 'diameter',
+        
+        # Common problem scenarios
+        'population', 'temperature', 'weight', 'shares', 'distributes', 'splits',
+        'mixture', 'recipe', 'ingredients', 'concentration', 'percentage'
+    )
+    
+    # Each keyword list compiled to one regex, so a check is a single scan of the text
+    operation_patterns = {
+        operation: keyword_pattern(*keywords) for operation, keywords in operation_keywords.items()
+    }
+    # Arithmetic operations in the order a word problem's keywords are checked
+    operation_symbols = (
+        ('+', operation_patterns['addition']),
+        ('-', operation_patterns['subtraction']),
+        ('*', operation_patterns['multiplication']),
+        ('/', operation_patterns['division'])
+    )
+    narrative_pattern = keyword_pattern(*narrative_indicators)
+    number_word_pattern = keyword_pattern(*number_words)
+    
+    # Single-character symbols that mark an input as plain math notation
+    math_symbols = frozenset('+-*/=^xy')
+    
     def __init__(self):
         """Initialize the NLP processor for word problems"""
-        self.number_words = {
-            'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
-            'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
-            'eleven': 11, 'twelve': 12, 'thirteen': 13, 'fourteen': 14, 'fifteen': 15,
-            'sixteen': 16, 'seventeen': 17, 'eighteen': 18, 'nineteen': 19, 'twenty': 20,
-            'thirty': 30, 'forty': 40, 'fifty': 50, 'sixty': 60, 'seventy': 70,
-            'eighty': 80, 'ninety': 90, 'hundred': 100, 'thousand': 1000, 'million': 1000000
-        }
-        
-        self.operation_keywords = {
-            'addition': ['+', 'plus', 'add', 'sum', 'total', 'combined', 'altogether', 'increased by'],
-            'subtraction': ['-', 'minus', 'subtract', 'difference', 'less than', 'decreased by', 'reduced by'],
-            'multiplication': ['*', 'times', 'multiply', 'product', 'of', 'twice', 'double', 'triple'],
-            'division': ['/', 'divide', 'divided by', 'quotient', 'per', 'ratio', 'split', 'share'],
-            'equals': ['=', 'equals', 'is', 'are', 'makes', 'gives', 'results in']
+        # Handler for each type _identify_problem_type returns; anything else is general
+        self.problem_handlers = {
+            'complex_motion_problem': self._handle_complex_motion_problem,
+            'speed_distance_time': self._handle_speed_problem,
+            'age_problem': self._handle_age_problem,
+            'money_problem': self._handle_money_problem,
+            'geometry_problem': self._handle_geometry_problem,
+            'percentage_problem': self._handle_percentage_problem,
+            'mixture_problem': self._handle_mixture_problem,
+            'work_problem': self._handle_work_problem,
+            'growth_problem': self._handle_growth_problem,
+            'system_word_problem': self._handle_system_word_problem,
+            'algebra_word': self._handle_algebra_word_problem
         }
     
     def is_word_problem(self, text):
         """Determine if the input is a word problem"""
-        # Enhanced narrative indicators for better detection
-        narrative_indicators = [
-            # People and objects
-            'a car', 'a person', 'john', 'mary', 'the train', 'the bus', 'a store', 'a student',
-            'a teacher', 'a worker', 'sarah', 'mike', 'a farmer', 'a builder', 'the company',
-            
-            # Question words and phrases
-            'if', 'when', 'how much', 'how many', 'what is', 'find', 'calculate', 'determine',
-            'how old', 'how long', 'how far', 'how fast', 'how tall', 'how wide',
-            
-            # Time and measurement units
-            'years old', 'miles', 'hours', 'minutes', 'seconds', 'days', 'weeks', 'months',
-            'feet', 'meters', 'inches', 'centimeters', 'kilometers', 'yards',
-            
-            # Money and commerce
-            'dollars', 'cents', 'price', 'cost', 'buy', 'sell', 'profit', 'discount', 'sale',
-            'budget', 'spend', 'earn', 'save', 'total cost', 'change',
-            
-            # Motion and physics
-            'speed', 'rate', 'time', 'distance', 'travels', 'drives', 'walks', 'runs',
-            'acceleration', 'velocity', 'moves',
-            
-            # Geometry and shapes
-            'rectangle', 'square', 'circle', 'triangle', 'area', 'perimeter', 'volume',
-            'length', 'width', 'height', 'radius', 'diameter',
-            
-            # Common problem scenarios
-            'population', 'temperature', 'weight', 'shares', 'distributes', 'splits',
-            'mixture', 'recipe', 'ingredients', 'concentration', 'percentage'
-        ]
-        
-        text_lower = text.lower()
-        
-        # Check if it contains narrative language
-        has_narrative = any(indicator in text_lower for indicator in narrative_indicators)
+        # Check if it contains narrative language; the search stops at the first indicator,
+        # and without one there is nothing else to check
+        if not self.narrative_pattern.search(text.lower()):
+            return False
         
         # Check if it's not just a mathematical expression
-        has_math_symbols = any(symbol in text for symbol in ['+', '-', '*', '/', '=', '^', 'x', 'y'])
+        has_math_symbols = not self.math_symbols.isdisjoint(text)
         
         # It's a word problem if it has narrative elements and isn't purely mathematical
-        return has_narrative and not (has_math_symbols and len(text.split()) < 5)
+        return not (has_math_symbols and len(text.split()) < 5)
     
     def extract_math_from_text(self, text):
         """Extract mathematical expressions from word problems"""
@@ -84,30 +153,8 @@ class NLPProcessor:
             problem_type = self._identify_problem_type(text_lower)
             
             # Generate mathematical expression based on problem type
-            if problem_type == 'complex_motion_problem':
-                return self._handle_complex_motion_problem(text_lower, numbers)
-            elif problem_type == 'speed_distance_time':
-                return self._handle_speed_problem(text_lower, numbers)
-            elif problem_type == 'age_problem':
-                return self._handle_age_problem(text_lower, numbers)
-            elif problem_type == 'money_problem':
-                return self._handle_money_problem(text_lower, numbers)
-            elif problem_type == 'geometry_problem':
-                return self._handle_geometry_problem(text_lower, numbers)
-            elif problem_type == 'percentage_problem':
-                return self._handle_percentage_problem(text_lower, numbers)
-            elif problem_type == 'mixture_problem':
-                return self._handle_mixture_problem(text_lower, numbers)
-            elif problem_type == 'work_problem':
-                return self._handle_work_problem(text_lower, numbers)
-            elif problem_type == 'growth_problem':
-                return self._handle_growth_problem(text_lower, numbers)
-            elif problem_type == 'system_word_problem':
-                return self._handle_system_word_problem(text_lower, numbers)
-            elif problem_type == 'algebra_word':
-                return self._handle_algebra_word_problem(text_lower, numbers)
-            else:
-                return self._handle_general_word_problem(text_lower, numbers)
+            handler = self.problem_handlers.get(problem_type, self._handle_general_word_problem)
+            return handler(text_lower, numbers)
                 
         except Exception as e:
             return None
@@ -117,34 +164,41 @@ class NLPProcessor:
         numbers = []
         
         # Extract digit numbers (including decimals, fractions, and percentages)
-        digit_numbers = re.findall(r'\d+(?:\.\d+)?', text)
+        digit_numbers = DIGIT_NUMBER.findall(text)
         numbers.extend([float(num) for num in digit_numbers])
         
         # Extract fractions like "1/2", "3/4"
-        fractions = re.findall(r'(\d+)/(\d+)', text)
+        fractions = FRACTION.findall(text)
         for num, den in fractions:
             if int(den) != 0:  # Avoid division by zero
                 numbers.append(float(num) / float(den))
         
         # Extract percentages and convert to decimals
-        percentages = re.findall(r'(\d+(?:\.\d+)?)%', text)
+        percentages = PERCENTAGE.findall(text)
         numbers.extend([float(p) / 100 for p in percentages])
         
-        # Extract word numbers with better compound number handling
-        words = text.split()
+        # Extract word numbers with better compound number handling; the text arrives
+        # lowercased. One scan of the whole text skips the word loop when no number word
+        # can occur; otherwise each punctuation-stripped word is looked up once, giving
+        # its value or None, and the compound check below reads those values. Words that
+        # are already all letters and digits have nothing to strip, so skip the regex.
+        if self.number_word_pattern.search(NON_WORD_CHARS.sub('', text)):
+            values = [
+                self.number_words.get(word if word.isalnum() else NON_WORD_CHARS.sub('', word))
+                for word in text.split()
+            ]
+        else:
+            values = []
         i = 0
-        while i < len(words):
-            word = re.sub(r'[^\w]', '', words[i].lower())
+        while i < len(values):
+            current_num = values[i]
             
             # Handle compound numbers like "twenty-five"
-            if word in self.number_words:
-                current_num = self.number_words[word]
-                
+            if current_num is not None:
                 # Check for compound numbers
-                if i + 1 < len(words):
-                    next_word = re.sub(r'[^\w]', '', words[i + 1].lower())
-                    if next_word in self.number_words:
-                        next_num = self.number_words[next_word]
+                if i + 1 < len(values):
+                    next_num = values[i + 1]
+                    if next_num is not None:
                         # Handle cases like "twenty five" or "one hundred"
                         if current_num >= 20 and next_num < 10:  # e.g., "twenty five"
                             current_num += next_num
@@ -157,98 +211,93 @@ class NLPProcessor:
             i += 1
         
         # Remove duplicates while preserving order
-        seen = set()
-        unique_numbers = []
-        for num in numbers:
-            if num not in seen:
-                seen.add(num)
-                unique_numbers.append(num)
-        
-        return unique_numbers
+        return list(dict.fromkeys(numbers))
     
     def _handle_relationship_problems(self, text, numbers):
         """Handle complex relationship problems like 'twice as many as'"""
         
         # Handle "twice as many as" patterns
-        if re.search(r'twice as many.*as', text) or re.search(r'has twice', text):
+        if TWICE_RELATION.search(text):
             if len(numbers) >= 1:
                 # Pattern: "John has twice as many apples as Mary, and Mary has 5 apples"
                 # This means John = 2 * Mary = 2 * 5
                 return f"2 * {numbers[0]}"
         
         # Handle "three times as many" patterns
-        if re.search(r'three times.*as', text) or re.search(r'triple.*as', text):
+        if TRIPLE_RELATION.search(text):
             if len(numbers) >= 1:
                 return f"3 * {numbers[0]}"
         
         # Handle "half as many" patterns
-        if re.search(r'half.*as', text) or re.search(r'half of', text):
+        if HALF_RELATION.search(text):
             if len(numbers) >= 1:
                 return f"{numbers[0]} / 2"
         
         # Handle comparative problems with explicit relationships
-        if re.search(r'(\w+) has (\d+) more than (\w+)', text):
+        match = MORE_THAN_RELATION.search(text)
+        if match:
             # Extract the specific relationship
-            match = re.search(r'(\w+) has (\d+) more than (\w+)', text)
-            if match and len(numbers) >= 2:
+            if len(numbers) >= 2:
                 difference = match.group(2)
                 # If we know one person's amount, calculate the other
                 return f"x + {difference} = {numbers[-1]}"
         
         return None
     
-    def _identify_problem_type(self, text):
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _identify_problem_type(text):
         """Identify the type of word problem with enhanced categorization"""
         # Complex motion problems (upstream/downstream, etc.)
-        if any(keyword in text for keyword in ['upstream', 'downstream', 'current', 'still water', 'wind']):
+        if COMPLEX_MOTION_KEYWORDS.search(text):
             return 'complex_motion_problem'
         
         # Motion and physics problems
-        elif any(keyword in text for keyword in ['speed', 'miles', 'hours', 'mph', 'km/h', 'travels', 'distance', 'far', 'velocity', 'acceleration']):
+        elif MOTION_KEYWORDS.search(text):
             return 'speed_distance_time'
         
         # Age-related problems
-        elif any(keyword in text for keyword in ['years old', 'age', 'older', 'younger', 'born']):
+        elif AGE_KEYWORDS.search(text):
             return 'age_problem'
         
         # Money and commerce problems
-        elif any(keyword in text for keyword in ['dollars', 'cents', 'money', 'cost', 'price', 'buy', 'sell', 'profit', 'discount', 'budget', 'earn', 'spend']):
+        elif MONEY_KEYWORDS.search(text):
             return 'money_problem'
         
         # Geometry problems
-        elif any(keyword in text for keyword in ['rectangle', 'square', 'circle', 'triangle', 'area', 'perimeter', 'volume', 'length', 'width', 'height', 'radius']):
+        elif GEOMETRY_KEYWORDS.search(text):
             return 'geometry_problem'
         
         # Percentage and ratio problems
-        elif any(keyword in text for keyword in ['percent', '%', 'percentage', 'ratio', 'proportion', 'rate']):
+        elif PERCENTAGE_KEYWORDS.search(text):
             return 'percentage_problem'
         
         # Mixture and concentration problems
-        elif any(keyword in text for keyword in ['mixture', 'solution', 'concentration', 'pure', 'dilute', 'mix']):
+        elif MIXTURE_KEYWORDS.search(text):
             return 'mixture_problem'
         
         # Work and time problems
-        elif any(keyword in text for keyword in ['work', 'job', 'complete', 'finish', 'together', 'alone', 'rate of work']):
+        elif WORK_KEYWORDS.search(text):
             return 'work_problem'
         
         # System of equations problems (two unknowns)
-        elif any(phrase in text for phrase in ['two numbers', 'find the numbers', 'sum and difference', 'sum to']) and any(keyword in text for keyword in ['difference', 'sum']):
+        elif SYSTEM_PHRASES.search(text) and SYSTEM_KEYWORDS.search(text):
             return 'system_word_problem'
         
         # Number problems and algebra
-        elif any(keyword in text for keyword in ['consecutive', 'number', 'sum', 'product', 'difference', 'twice', 'half', 'triple']):
+        elif NUMBER_KEYWORDS.search(text):
             return 'algebra_word'
         
         # Population and growth problems
-        elif any(keyword in text for keyword in ['population', 'growth', 'increase', 'decrease', 'double', 'triple']):
+        elif GROWTH_KEYWORDS.search(text):
             return 'growth_problem'
         
         # General calculation problems
-        elif any(keyword in text for keyword in ['calculate', 'what is', 'find', 'determine']):
+        elif CALCULATION_KEYWORDS.search(text):
             return 'general'
         
         # Variable-based problems
-        elif any(keyword in text for keyword in ['x', 'unknown', 'variable', 'equals', 'is equal']):
+        elif VARIABLE_KEYWORDS.search(text):
             return 'algebra_word'
         
         else:
@@ -328,7 +377,7 @@ class NLPProcessor:
         # Look for equation structure
         if '=' in text or 'equals' in text or 'is' in text:
             # Try to build an equation
-            parts = re.split(r'\s+(?:is|equals|=)\s+', text)
+            parts = EQUATION_VERB.split(text)
             if len(parts) == 2:
                 left_expr = self._text_to_expression(parts[0], numbers)
                 right_expr = self._text_to_expression(parts[1], numbers)
@@ -369,29 +418,12 @@ class NLPProcessor:
                 # Sum of two consecutive integers is N -> x + (x+1) = N
                 return f"x + (x + 1) = {sum_value}"
         
-        # Handle simple calculation patterns (not equations)
-        if any(phrase in text for phrase in ['what is', 'calculate', 'find the value of']):
-            if len(numbers) >= 2:
-                if any(keyword in text for keyword in self.operation_keywords['addition']):
-                    return f"{numbers[0]} + {numbers[1]}"
-                elif any(keyword in text for keyword in self.operation_keywords['subtraction']):
-                    return f"{numbers[0]} - {numbers[1]}"
-                elif any(keyword in text for keyword in self.operation_keywords['multiplication']):
-                    return f"{numbers[0]} * {numbers[1]}"
-                elif any(keyword in text for keyword in self.operation_keywords['division']):
-                    return f"{numbers[0]} / {numbers[1]}"
-        
-        # Default behavior for other cases
+        # Simple calculations ("what is", "calculate", ...) and all other cases: the first
+        # operation, in priority order, whose keywords appear joins the first two numbers
         if len(numbers) >= 2:
-            # Determine operation based on keywords
-            if any(keyword in text for keyword in self.operation_keywords['addition']):
-                return f"{numbers[0]} + {numbers[1]}"
-            elif any(keyword in text for keyword in self.operation_keywords['subtraction']):
-                return f"{numbers[0]} - {numbers[1]}"
-            elif any(keyword in text for keyword in self.operation_keywords['multiplication']):
-                return f"{numbers[0]} * {numbers[1]}"
-            elif any(keyword in text for keyword in self.operation_keywords['division']):
-                return f"{numbers[0]} / {numbers[1]}"
+            for symbol, pattern in self.operation_symbols:
+                if pattern.search(text):
+                    return f"{numbers[0]} {symbol} {numbers[1]}"
         
         return None
     
@@ -1,12 +1,48 @@
+import io
 import sympy as sp
-import matplotlib.pyplot as plt
 import re
-from math_solver import MathSolver
+from functools import lru_cache
+from math_solver import MathSolver, solve_cached, symbol_cached
+
+# sqrt(...) calls, rewritten with the √ symbol for display
+SQRT_CALL = re.compile(r'sqrt\(([^)]+)\)')
+
+@lru_cache(maxsize=4096)
+def format_math_symbols(text):
+    """Rewrite a step or answer string with display symbols, reusing results for repeated text"""
+    # Replace sqrt with √ symbol; most steps have no sqrt call, so skip the regex for them
+    if 'sqrt(' in text:
+        text = SQRT_CALL.sub(r'√(\1)', text)
+    
+    # Replace other common mathematical symbols
+    text = text.replace('pi', 'π')
+    text = text.replace('infinity', '∞')
+    text = text.replace('oo', '∞')
+    text = text.replace('**', '^')  # Power notation
+    
+    return text
+
+# Most plotted expressions whose figure and PNG are kept per formatter
+PLOT_CACHE_SIZE = 32
 
 class SolutionFormatter:
+    __slots__ = ("solver", "_plot", "type_formatters")
+    
     def __init__(self):
         """Initialize the solution formatter"""
         self.solver = MathSolver()
+        # Recently plotted expressions keep their figure and PNG, so a function that is
+        # plotted again skips matplotlib entirely; lru_cache is safe to share across threads
+        self._plot = lru_cache(maxsize=PLOT_CACHE_SIZE)(self._render_plot)
+        # Extra formatting for each solution type; other types (e.g. calculations) get none
+        self.type_formatters = {
+            "algebraic": self._format_algebraic_solution,
+            "equation": self._format_equation_solution,
+            "derivative": self._format_derivative_solution,
+            "integral": self._format_integral_solution,
+            "system_of_equations": self._format_system_solution,
+            "general": self._format_general_solution
+        }
     
     def format_solution(self, solution_data):
         """Format the solution data for display"""
@@ -27,154 +63,155 @@ class SolutionFormatter:
         # Add type-specific formatting
         problem_type = solution_data.get("type", "general")
         
-        if problem_type == "algebraic":
-            formatted_result = self._format_algebraic_solution(solution_data, formatted_result)
-        elif problem_type == "equation":
-            formatted_result = self._format_equation_solution(solution_data, formatted_result)
-        elif problem_type == "derivative":
-            formatted_result = self._format_derivative_solution(solution_data, formatted_result)
-        elif problem_type == "integral":
-            formatted_result = self._format_integral_solution(solution_data, formatted_result)
-        elif problem_type == "system_of_equations":
-            formatted_result = self._format_system_solution(solution_data, formatted_result)
-        elif problem_type == "general":
-            formatted_result = self._format_general_solution(solution_data, formatted_result)
+        type_formatter = self.type_formatters.get(problem_type)
+        if type_formatter is not None:
+            formatted_result = type_formatter(solution_data, formatted_result)
         
         return formatted_result
     
+    def _render_plot(self, expression):
+        """Plot an expression and rasterize it once; returns (figure, PNG bytes) or (None, None)"""
+        fig = self.solver.create_plot(expression)
+        if not fig:
+            return None, None
+        # The PNG is what callers display (and cache); cached figures are shared, so read-only
+        return fig, self._figure_to_png(fig)
+    
+    def _figure_to_png(self, fig):
+        """Render a matplotlib figure to PNG bytes"""
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
+        return buffer.getvalue()
+    
     def _format_algebraic_solution(self, solution_data, formatted_result):
         """Format algebraic problem solutions"""
+        info = formatted_result["info"]
         solutions = solution_data.get("solutions", [])
         
         if solutions:
             # Add solution verification
-            formatted_result["info"].append(f"Found {len(solutions)} solution(s)")
+            info.append(f"Found {len(solutions)} solution(s)")
             
             # Add solution types
-            for i, sol in enumerate(solutions):
-                if sol.is_real:
-                    formatted_result["info"].append(f"Solution {i+1}: {sol} (Real number)")
-                else:
-                    formatted_result["info"].append(f"Solution {i+1}: {sol} (Complex number)")
+            info.extend(
+                f"Solution {i}: {sol} ({'Real' if sol.is_real else 'Complex'} number)"
+                for i, sol in enumerate(solutions, 1)
+            )
         
         return formatted_result
     
     def _format_equation_solution(self, solution_data, formatted_result):
         """Format equation solutions"""
+        info = formatted_result["info"]
         solutions = solution_data.get("solutions", {})
         
         if solutions:
             for var, sols in solutions.items():
-                formatted_result["info"].append(f"Variable '{var}' has {len(sols)} solution(s)")
+                info.append(f"Variable '{var}' has {len(sols)} solution(s)")
                 
                 # Check for special solution types
                 for sol in sols:
                     if sol == 0:
-                        formatted_result["info"].append(f"'{var} = 0' is a trivial solution")
+                        info.append(f"'{var} = 0' is a trivial solution")
                     elif sol.is_rational:
-                        formatted_result["info"].append(f"'{var} = {sol}' is a rational solution")
+                        info.append(f"'{var} = {sol}' is a rational solution")
         
         return formatted_result
     
     def _format_derivative_solution(self, solution_data, formatted_result):
         """Format calculus derivative solutions"""
+        info = formatted_result["info"]
         derivative = solution_data.get("derivative")
         original_function = solution_data.get("original_function")
         
         if derivative and original_function:
             # Add derivative rules used
-            formatted_result["info"].append("Derivative calculated using standard differentiation rules")
+            info.append("Derivative calculated using standard differentiation rules")
             
             # Check for critical points
             try:
-                critical_points = sp.solve(derivative, sp.symbols('x'))
+                critical_points = solve_cached(derivative, symbol_cached('x'))
                 if critical_points:
-                    formatted_result["info"].append(f"Critical points (where f'(x) = 0): {critical_points}")
-            except:
+                    info.append(f"Critical points (where f'(x) = 0): {critical_points}")
+            except (sp.PolynomialError, NotImplementedError, ValueError, TypeError):
                 pass
             
             # Try to create a plot
             try:
-                plot_fig = self.solver.create_plot(original_function)
+                plot_fig, plot_png = self._plot(original_function)
                 if plot_fig:
                     formatted_result["plot"] = plot_fig
-            except:
+                    formatted_result["plot_png"] = plot_png
+            except Exception:
                 pass
         
         return formatted_result
     
     def _format_integral_solution(self, solution_data, formatted_result):
         """Format calculus integral solutions"""
+        info = formatted_result["info"]
         integral = solution_data.get("integral")
         original_function = solution_data.get("original_function")
         
         if integral and original_function:
             # Add integration information
-            formatted_result["info"].append("Integral calculated using standard integration rules")
-            formatted_result["info"].append("Don't forget the constant of integration (+C)")
+            info.append("Integral calculated using standard integration rules")
+            info.append("Don't forget the constant of integration (+C)")
             
             # Check if it's a definite integral
-            if hasattr(integral, 'free_symbols') and not integral.free_symbols:
-                formatted_result["info"].append("This appears to be a definite integral (numerical result)")
+            if isinstance(integral, sp.Basic) and not integral.free_symbols:
+                info.append("This appears to be a definite integral (numerical result)")
             
             # Try to create a plot of the original function
             try:
-                plot_fig = self.solver.create_plot(original_function)
+                plot_fig, plot_png = self._plot(original_function)
                 if plot_fig:
                     formatted_result["plot"] = plot_fig
-            except:
+                    formatted_result["plot_png"] = plot_png
+            except Exception:
                 pass
         
         return formatted_result
     
     def _format_general_solution(self, solution_data, formatted_result):
         """Format general expression solutions"""
+        info = formatted_result["info"]
         simplified = solution_data.get("simplified")
         factored = solution_data.get("factored")
         expanded = solution_data.get("expanded")
         
         # Add information about different forms
         if factored and factored != simplified:
-            formatted_result["info"].append(self._format_math_symbols("Factored form available - useful for finding zeros"))
+            info.append(self._format_math_symbols("Factored form available - useful for finding zeros"))
         
         if expanded and expanded != simplified:
-            formatted_result["info"].append(self._format_math_symbols("Expanded form available - useful for polynomial operations"))
+            info.append(self._format_math_symbols("Expanded form available - useful for polynomial operations"))
         
         # If expression has variables, try to create a plot
-        if simplified and hasattr(simplified, 'free_symbols'):
-            free_symbols = simplified.free_symbols
-            if len(free_symbols) == 1:
-                try:
-                    plot_fig = self.solver.create_plot(simplified)
-                    if plot_fig:
-                        formatted_result["plot"] = plot_fig
-                except:
-                    pass
+        if isinstance(simplified, sp.Basic) and len(simplified.free_symbols) == 1:
+            try:
+                plot_fig, plot_png = self._plot(simplified)
+                if plot_fig:
+                    formatted_result["plot"] = plot_fig
+                    formatted_result["plot_png"] = plot_png
+            except Exception:
+                pass
         
         return formatted_result
     
     def _format_math_symbols(self, text):
         """Convert mathematical expressions to use proper symbols"""
+        if not text:
+            return text
         if isinstance(text, str):
-            # Replace sqrt with √ symbol
-            text = re.sub(r'sqrt\(([^)]+)\)', r'√(\1)', text)
-            
-            # Replace other common mathematical symbols
-            text = text.replace('pi', 'π')
-            text = text.replace('infinity', '∞')
-            text = text.replace('oo', '∞')
-            text = text.replace('**', '^')  # Power notation
-            
-            # Handle negative square roots
-            text = re.sub(r'-√\(([^)]+)\)', r'-√(\1)', text)
-            
+            return format_math_symbols(text)
         return text
     
     def _latex_format(self, expression):
         """Convert sympy expression to LaTeX format (for future enhancement)"""
         try:
             return sp.latex(expression)
-        except:
+        except Exception:
             return str(expression)
     
     def add_step_explanations(self, steps, problem_type):
@@ -201,13 +238,14 @@ class SolutionFormatter:
     
     def _format_system_solution(self, solution_data, formatted_result):
         """Format system of equations solutions"""
-        formatted_result['info'].append("📊 This is a system of equations with multiple variables")
+        info = formatted_result['info']
+        info.append("📊 This is a system of equations with multiple variables")
         
         # Check if we have solutions for boat/current or similar problems
         answer = solution_data.get('answer', '')
         if 'b =' in answer and 'c =' in answer:
-            formatted_result['info'].append("🚤 b = speed of boat in still water, c = speed of current")
+            info.append("🚤 b = speed of boat in still water, c = speed of current")
         elif 'p =' in answer and 'w =' in answer:
-            formatted_result['info'].append("✈️ p = speed of plane in still air, w = wind speed")
+            info.append("✈️ p = speed of plane in still air, w = wind speed")
         
         return formatted_result
@@ -2,13 +2,17 @@ import streamlit as st
 from math_solver import MathSolver
 from solution_formatter import SolutionFormatter
 
+@st.cache_resource(show_spinner=False)
+def init_components():
+    """Create the solver and formatter once per process"""
+    return MathSolver(), SolutionFormatter()
+
 st.title("Math Solver Test")
 
 # Simple form
 equation = st.text_input("Enter equation:", "x + 5 = 10")
 if st.button("Solve"):
-    solver = MathSolver()
-    formatter = SolutionFormatter()
+    solver, formatter = init_components()
     
     result = solver.solve_problem(equation)
     st.write("Raw result:", result)
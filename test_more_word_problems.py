@@ -2,10 +2,19 @@
 """
 Test more specific word problem patterns that might be problematic
 """
+import re
 from nlp_processor import NLPProcessor
 from math_solver import MathSolver
 from solution_formatter import SolutionFormatter
 
+# First number in an answer string, allowing thousands separators
+ANSWER_NUMBER = re.compile(r'-?\d[\d,]*(?:\.\d+)?(?:[eE][-+]?\d+)?')
+
+def parse_answer_number(answer):
+    """Return the first number in the answer, or 0 when it has none"""
+    match = ANSWER_NUMBER.search(str(answer)) if answer else None
+    return float(match.group().replace(',', '')) if match else 0
+
 def test_problematic_patterns():
     """Test word problems that might be causing issues"""
     
@@ -61,8 +70,9 @@ def test_problematic_patterns():
             continue
             
         # Get numbers and problem type for analysis
-        numbers = nlp._extract_numbers(problem.lower())
-        problem_type = nlp._identify_problem_type(problem.lower())
+        problem_lower = problem.lower()
+        numbers = nlp._extract_numbers(problem_lower)
+        problem_type = nlp._identify_problem_type(problem_lower)
         print(f"Numbers: {numbers}")
         print(f"Type: {problem_type}")
         
@@ -75,7 +85,7 @@ def test_problematic_patterns():
                 print(f"Answer: {answer}")
                 
                 # Check if answer seems reasonable
-                answer_num = float(str(answer).replace(',', '').split()[0]) if answer else 0
+                answer_num = parse_answer_number(answer)
                 
                 if "total cost" in problem and "books" in problem and "pens" in problem:
                     if 45 <= answer_num <= 55:  # Should be around 49